@@ -0,0 +1,179 @@
+import asyncio
+import os
+import traceback
+import azure.core.exceptions as aze
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_share_exists import share_exists
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_list_files import file_entry
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_upload_file import MAX_RANGE_SIZE
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_download_file import partial_file_name
+
+# The async engine needs the aio clients of the SDK and aiohttp, both optional
+try:
+    import aiohttp
+    from azure.core.pipeline.transport import AioHttpTransport
+    from azure.storage.fileshare.aio import ShareClient as AsyncShareClient
+    HAS_AIO = True
+    AIO_IMPORT_ERROR = None
+except ImportError:
+    HAS_AIO = False
+    AIO_IMPORT_ERROR = traceback.format_exc()
+
+ENGINES = ["thread", "async"]
+AIO_REQUIREMENT = "azure-storage-file-share[aio]"
+
+
+def async_share_client(_connection_string, _share, _max_concurrency, **_kwargs):
+    # One aiohttp session for the whole run, its connection limit follows the number of operations in flight.
+    # Must be called inside the running event loop
+    connector = aiohttp.TCPConnector(limit=max(1, _max_concurrency))
+    transport = AioHttpTransport(session=aiohttp.ClientSession(connector=connector), session_owner=True)
+    return AsyncShareClient.from_connection_string(_connection_string, _share, transport=transport, **_kwargs)
+
+
+async def run_bounded(_operation, _items, _max_concurrency):
+    # Run _operation for every item with at most _max_concurrency in flight, on a single thread.
+    # A fixed set of workers pulls the items from a shared iterator, no task is created per item.
+    # Returns one error per item, None when the operation succeeded, in the same order as _items
+    errors = [None] * len(_items)
+    pending = iter(enumerate(_items))
+
+    async def worker():
+        for index, item in pending:
+            try:
+                await _operation(item)
+            except Exception as error:
+                errors[index] = str(error)
+
+    await asyncio.gather(*(worker() for _ in range(min(max(1, _max_concurrency), len(_items)))))
+    return errors
+
+
+async def upload_from_local_file(_file_client, _source_file, _range_size=MAX_RANGE_SIZE):
+    # The file is read range by range in the default executor, the event loop never waits for the disk.
+    # Only one range per upload in flight is held in memory
+    loop = asyncio.get_running_loop()
+    source_file = await loop.run_in_executor(None, open, _source_file, "rb")
+    try:
+        fd = source_file.fileno()
+        file_size = os.fstat(fd).st_size
+        await _file_client.create_file(size=file_size)
+        try:
+            for offset in range(0, file_size, _range_size):
+                data = await loop.run_in_executor(None, os.pread, fd, min(_range_size, file_size - offset), offset)
+                await _file_client.upload_range(data, offset=offset, length=len(data))
+        except Exception:
+            # Same rule as util_upload_file, a remote file with gaps is never left on the share
+            try:
+                await _file_client.delete_file()
+            except Exception:
+                pass
+            raise
+    finally:
+        source_file.close()
+
+
+async def download_to_local_file(_file_client, _local_file):
+    # Chunks are written in the default executor, the event loop never waits for the disk.
+    # Same rule as util_download_file, the partial file replaces _local_file only once complete
+    loop = asyncio.get_running_loop()
+    downloader = await _file_client.download_file()
+    partial_file = partial_file_name(_local_file)
+    local_file = await loop.run_in_executor(None, open, partial_file, "wb")
+    try:
+        try:
+            async for chunk in downloader.chunks():
+                await loop.run_in_executor(None, local_file.write, chunk)
+        finally:
+            await loop.run_in_executor(None, local_file.close)
+        await loop.run_in_executor(None, os.replace, partial_file, _local_file)
+    except BaseException:
+        try:
+            os.remove(partial_file)
+        except OSError:
+            pass
+        raise
+
+
+def async_upload_files(_connection_string, _share, _files, _max_concurrency=1):
+    # _files is a list of (local file, remote file)
+    async def upload_all():
+        async with async_share_client(_connection_string, _share, _max_concurrency) as share:
+            async def upload(item):
+                await upload_from_local_file(share.get_file_client(item[1]), item[0])
+            return await run_bounded(upload, _files, _max_concurrency)
+
+    return asyncio.run(upload_all())
+
+
+def async_download_files(_connection_string, _share, _files, _max_concurrency=1, **_kwargs):
+    # _files is a list of (remote file, local file), _kwargs are client settings such as max_single_get_size
+    async def download_all():
+        async with async_share_client(_connection_string, _share, _max_concurrency, **_kwargs) as share:
+            async def download(item):
+                await download_to_local_file(share.get_file_client(item[0]), item[1])
+            return await run_bounded(download, _files, _max_concurrency)
+
+    return asyncio.run(download_all())
+
+
+def async_delete_files(_connection_string, _share, _files, _max_concurrency=1):
+    async def delete_all():
+        async with async_share_client(_connection_string, _share, _max_concurrency) as share:
+            async def delete(file):
+                await share.get_file_client(file).delete_file()
+            return await run_bounded(delete, _files, _max_concurrency)
+
+    return asyncio.run(delete_all())
+
+
+async def walk_files(_share_client, _base_dir, _rel_dir, _semaphore, _include, _recursive, _name_starts_with, _output):
+    # The semaphore is released before the sub directories are walked, a directory never waits for its children.
+    # The service applies the name prefix to directories too, callers only set it when _recursive is False
+    directories = []
+    async with _semaphore:
+        entries = _share_client.list_directories_and_files(directory_name=(_base_dir + _rel_dir).rstrip("/"),
+                                                           name_starts_with=_name_starts_with or None, include=_include)
+        async for entry in entries:
+            if entry['is_directory']:
+                directories.append(entry['name'])
+            else:
+                _output.append(dict(file_entry(entry, _include), path=_rel_dir + entry['name']))
+    if _recursive:
+        await asyncio.gather(*(walk_files(_share_client, _base_dir, _rel_dir + directory + "/", _semaphore, _include,
+                                          _recursive, None, _output) for directory in directories))
+
+
+def list_files_async(_account_name, _connection_string, _share, _dir, _print_path, _max_concurrency=1, _include=None,
+                     _recursive=False, _name_starts_with=None):
+    # Same result as list_files_in_tree, or as list_files_in_share when _recursive is False.
+    # _name_starts_with is ignored for recursive listings, sub directories that do not match it must still be walked
+    output = []
+    status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+    if not share_exist:
+        msg_ret = f"Invalid File Share name: <{_share}>. Share does not exist in Account Storage <{_account_name}>"
+        return False, msg_ret, output
+
+    async def list_all():
+        async with async_share_client(_connection_string, _share, _max_concurrency) as share:
+            await walk_files(share, _dir + "/" if _dir else "", "", asyncio.Semaphore(max(1, _max_concurrency)), _include,
+                             _recursive, None if _recursive else _name_starts_with, output)
+
+    try:
+        asyncio.run(list_all())
+        output.sort(key=lambda file: file['path'])
+        # Only recursive listings return the relative path of the files
+        if not _recursive:
+            output = [{key: value for key, value in file.items() if key != 'path'} for file in output]
+        status = True
+        if len(output) == 0:
+            msg_ret = f"No Files found under path <{_print_path}> in share <{_share}>"
+        else:
+            msg_ret = f"List of Files created under path <{_print_path}> in share <{_share}>"
+    except aze.ResourceNotFoundError:
+        msg_ret = f"No files to list under path <{_print_path}> in share <{_share}> ,path not found"
+        status = False
+    except Exception as error:
+        status = False
+        msg_ret = f"List of Files not created under path <{_print_path}> in share <{_share}>. Error: <{error}>"
+
+    return status, msg_ret, output
@@ -0,0 +1,58 @@
+import threading
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.fileshare import ShareServiceClient
+
+# Clients and HTTP sessions are created once per module process and shared by every helper,
+# so all the requests of a task reuse the same pool of TLS connections
+_lock = threading.Lock()
+_sessions = {}
+_pool_sizes = {}
+_service_clients = {}
+_share_clients = {}
+_directory_clients = {}
+
+
+def pooled_session(_connection_string, _pool_size=1):
+    # One requests session per connection string. The pool grows to the largest concurrency asked by a caller
+    pool_size = max(1, _pool_size)
+    session = _sessions.get(_connection_string)
+    if session is None:
+        session = requests.Session()
+        _sessions[_connection_string] = session
+    if _pool_sizes.get(_connection_string, 0) < pool_size:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _pool_sizes[_connection_string] = pool_size
+    return session
+
+
+def get_service_client(_connection_string, _pool_size=1, **_kwargs):
+    # _kwargs are client settings such as max_single_get_size, clients with other settings share the same session
+    key = (_connection_string, tuple(sorted(_kwargs.items())))
+    with _lock:
+        session = pooled_session(_connection_string, _pool_size)
+        if key not in _service_clients:
+            transport = RequestsTransport(session=session, session_owner=False)
+            _service_clients[key] = ShareServiceClient.from_connection_string(_connection_string, transport=transport, **_kwargs)
+        return _service_clients[key]
+
+
+def get_share_client(_connection_string, _share, _pool_size=1, **_kwargs):
+    # Share clients come from the service client and use its pipeline
+    service_client = get_service_client(_connection_string, _pool_size, **_kwargs)
+    key = (_connection_string, tuple(sorted(_kwargs.items())), _share)
+    with _lock:
+        if key not in _share_clients:
+            _share_clients[key] = service_client.get_share_client(_share)
+        return _share_clients[key]
+
+
+def get_directory_client(_connection_string, _share, _directory, _pool_size=1):
+    share_client = get_share_client(_connection_string, _share, _pool_size)
+    key = (_connection_string, _share, _directory)
+    with _lock:
+        if key not in _directory_clients:
+            _directory_clients[key] = share_client.get_directory_client(directory_path=_directory)
+        return _directory_clients[key]
@@ -0,0 +1,16 @@
+def delete_file(_share, _file):
+    # Worker used by the delete pools, returns the error instead of raising it
+    try:
+        _share.get_file_client(_file).delete_file()
+        return None
+    except Exception as error:
+        return str(error)
+
+
+def delete_directory(_share, _directory):
+    # Same as delete_file for an empty Directory
+    try:
+        _share.get_directory_client(directory_path=_directory).delete_directory()
+        return None
+    except Exception as error:
+        return str(error)
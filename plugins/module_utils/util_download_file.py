@@ -0,0 +1,82 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+DEFAULT_RANGE_SIZE = 4 * 1024 * 1024
+
+
+def preallocate_local_file(_fd, _file_size):
+    # Reserve disk blocks when the platform allows it, otherwise just set the size
+    try:
+        if _file_size > 0:
+            os.posix_fallocate(_fd, 0, _file_size)
+            return
+    except (AttributeError, OSError):
+        pass
+    os.ftruncate(_fd, _file_size)
+
+
+def partial_file_name(_local_file):
+    # Hidden file next to the target, so the final rename stays on the same file system
+    directory, name = os.path.split(_local_file)
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex}.part")
+
+
+@contextmanager
+def open_local_file(_local_file):
+    # The download is written to a partial file renamed over _local_file once complete. A failed download
+    # leaves the previous local copy untouched, sync modes never take a file with gaps as up to date
+    partial_file = partial_file_name(_local_file)
+    try:
+        with open(partial_file, "wb") as data:
+            yield data
+        os.replace(partial_file, _local_file)
+    except BaseException:
+        try:
+            os.remove(partial_file)
+        except OSError:
+            pass
+        raise
+
+
+def download_file_in_ranges(_file_client, _local_file, _file_size, _range_size, _max_connections):
+    offsets = range(0, _file_size, _range_size)
+    with open_local_file(_local_file) as data:
+        fd = data.fileno()
+        preallocate_local_file(fd, _file_size)
+
+        def download_range(offset):
+            position = offset
+            stream = _file_client.download_file(offset=offset, length=min(_range_size, _file_size - offset))
+            for chunk in stream.chunks():
+                # pwrite does not move the shared file pointer, so workers need no lock
+                os.pwrite(fd, chunk, position)
+                position += len(chunk)
+
+        with ThreadPoolExecutor(max_workers=min(_max_connections, len(offsets))) as executor:
+            list(executor.map(download_range, offsets))
+
+
+def download_to_local_file(_file_client, _local_file, _file_size=None, _range_size=DEFAULT_RANGE_SIZE, _max_connections=1):
+    # Large files are fetched as concurrent ranges when their size is known
+    if _max_connections > 1 and _file_size is not None and _file_size > _range_size:
+        download_file_in_ranges(_file_client, _local_file, _file_size, _range_size, _max_connections)
+        return
+    # Stream the file chunk by chunk, only one chunk is held in memory.
+    # Chunk size is set on the client with max_single_get_size and max_chunk_get_size
+    stream = _file_client.download_file()
+    with open_local_file(_local_file) as data:
+        for chunk in stream.chunks():
+            data.write(chunk)
+
+
+def download_file(_share, _source_file, _local_file, _file_size=None, _range_size=DEFAULT_RANGE_SIZE, _max_connections=1):
+    # Worker used by the download pools, returns the error instead of raising it
+    try:
+        file = _share.get_file_client(_source_file)
+        download_to_local_file(file, _local_file, _file_size, _range_size, _max_connections)
+        return None
+    except Exception as error:
+        return str(error)
@@ -0,0 +1,36 @@
+import re
+from datetime import datetime, timedelta, timezone
+from ansible.module_utils.common.text.formatters import human_to_bytes
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_sync_files import as_utc
+
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_age(_age):
+    # Same syntax as the age option of ansible.builtin.find: a number with an optional unit, seconds by default
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw]?)\s*", str(_age).lower())
+    if not match:
+        raise ValueError(f"Invalid age <{_age}>. Use a number followed by s, m, h, d or w")
+    return timedelta(seconds=int(match.group(1)) * AGE_UNITS[match.group(2) or "s"])
+
+
+def file_filter(_older_than=None, _newer_than=None, _min_size=None, _max_size=None):
+    # Build one test on the last modified date and size returned by the listing, None when no filter is set.
+    # Raises ValueError for an invalid age or size
+    now = datetime.now(timezone.utc)
+    tests = []
+    if _older_than:
+        older_limit = now - parse_age(_older_than)
+        tests.append(lambda file: file.get('last_modified') is not None and as_utc(file['last_modified']) < older_limit)
+    if _newer_than:
+        newer_limit = now - parse_age(_newer_than)
+        tests.append(lambda file: file.get('last_modified') is not None and as_utc(file['last_modified']) > newer_limit)
+    if _min_size:
+        min_bytes = human_to_bytes(_min_size)
+        tests.append(lambda file: file['size'] >= min_bytes)
+    if _max_size:
+        max_bytes = human_to_bytes(_max_size)
+        tests.append(lambda file: file['size'] <= max_bytes)
+    if not tests:
+        return None
+    return lambda file: all(test(file) for test in tests)
@@ -1,20 +1,27 @@
-from azure.storage.fileshare import ShareClient
 import azure.core.exceptions as aze
-from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_list_shares import list_shares_in_service
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_share_exists import share_exists
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_clients import get_share_client
+
+
+def directory_entry(_directory):
+    return {"name": _directory['name'], "file_id": _directory['file_id'], "is_directory": _directory['is_directory']}
+
+
+def iter_directories_in_share(_share_client, _dir):
+    # Lazy listing, yields the directories of every page as soon as the page is received
+    for page in _share_client.list_directories_and_files(directory_name=_dir).by_page():
+        yield [directory_entry(file) for file in page if file['is_directory']]
 
 
 def list_directories_in_share(_account_name, _connection_string, _share, _dir, _print_path):
     output = []
-    status, msg_ret, shares_in_service = list_shares_in_service(_account_name, _connection_string)
-    if status:
-        share_exist = [share_name for share_name in shares_in_service if share_name == _share]
-    if len(share_exist) == 1:
-        share = ShareClient.from_connection_string(_connection_string, _share)
+    status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+    if share_exist:
+        share = get_share_client(_connection_string, _share)
         try:
             # List directories in share
-            my_files = {"results": list(share.list_directories_and_files(directory_name=_dir))}
+            output = [directory for page in iter_directories_in_share(share, _dir) for directory in page]
             status = True
-            output = [{"name": file['name'],"file_id": file['file_id'],"is_directory": file['is_directory']} for file in my_files['results'] if file['is_directory']]
             if len(output) == 0:
                 msg_ret = f"No Directories found for path <{_print_path}> in share <{_share}>"
             else:
@@ -1,27 +1,73 @@
-from azure.storage.fileshare import ShareClient
+from datetime import datetime
 import azure.core.exceptions as aze
-from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_list_shares import list_shares_in_service
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_share_exists import share_exists
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_clients import get_share_client
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_listing_cache import get_cached_listing, \
+    set_cached_listing
 
 
+# Extra properties the service returns in the listing for every include option
+LISTING_INCLUDE = {
+    "timestamps": ["creation_time", "last_access_time", "last_write_time", "change_time", "last_modified"],
+    "etag": ["etag"],
+    "attributes": ["file_attributes"],
+}
 
-def list_files_in_share(_account_name, _connection_string, _share, _dir, _print_path):
+
+def file_entry(_file, _include=None):
+    entry = {"name": _file['name'], "size": _file['size'], "file_id": _file['file_id'],
+             "is_directory": _file['is_directory']}
+    # Extra properties returned by the listing when include options are requested
+    for option in _include or []:
+        for key in LISTING_INCLUDE.get(option, []):
+            entry[key] = _file.get(key)
+    return entry
+
+
+def format_entries(_entries):
+    # Dates are returned as ISO 8601 strings in module output
+    return [{key: value.isoformat() if isinstance(value, datetime) else value for key, value in entry.items()}
+            for entry in _entries]
+
+
+def iter_files_in_share(_share_client, _dir, _include=None, _name_starts_with=None):
+    # Lazy listing, yields the files of every page as soon as the page is received
+    pages = _share_client.list_directories_and_files(directory_name=_dir, name_starts_with=_name_starts_with or None,
+                                                     include=_include).by_page()
+    for page in pages:
+        yield [file_entry(file, _include) for file in page if not file['is_directory']]
+
+
+def iter_cached_files_in_share(_share_client, _connection_string, _share, _dir, _include=None, _name_starts_with=None,
+                               _cache_ttl=0):
+    # Same pages as iter_files_in_share. With a cache TTL the whole directory is listed once, kept on disk
+    # and the name prefix is applied locally, so later tasks of the play skip the listing
+    if not _cache_ttl:
+        yield from iter_files_in_share(_share_client, _dir, _include, _name_starts_with)
+        return
+    files = get_cached_listing(_connection_string, _share, _dir, _include, _cache_ttl)
+    if files is None:
+        files = [file for page in iter_files_in_share(_share_client, _dir, _include) for file in page]
+        set_cached_listing(_connection_string, _share, _dir, _include, files)
+    # A cached listing may hold more include options than requested, entries are cut back to the requested ones
+    yield [file_entry(file, _include) for file in files if file['name'].startswith(_name_starts_with or "")]
+
+
+def list_files_in_share(_account_name, _connection_string, _share, _dir, _print_path, _include=None, _name_starts_with=None,
+                        _cache_ttl=0):
     output = {}
-    status, msg_ret, shares_in_service = list_shares_in_service(_account_name, _connection_string)
-    if status:
-        share_exist = [share_name for share_name in shares_in_service if share_name == _share]
-    if len(share_exist) != 1:
+    status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+    if not share_exist:
         status = False
         msg_ret = f"Invalid File Share name: <{_share}>. Share does not exist in Account Storage <{_account_name}>"
         return status, msg_ret, []
     else:
-        share = ShareClient.from_connection_string(_connection_string, _share)
+        share = get_share_client(_connection_string, _share)
         try:
-            # List files in the directory
-            my_files = {"results": list(share.list_directories_and_files(directory_name=_dir))}
+            # List files in the directory, only names starting with _name_starts_with when it is set
+            output = [file for page in iter_cached_files_in_share(share, _connection_string, _share, _dir, _include,
+                                                                  _name_starts_with, _cache_ttl) for file in page]
             status = True
-            output = [{"name": file['name'], "size": file['size'], "file_id": file['file_id'],
-                        "is_directory": file['is_directory']} for file in my_files['results'] if
-                        not file['is_directory']]
             if len(output) == 0:
                 msg_ret = f"No Files found for path <{_print_path}> in share <{_share}>"
             else:
@@ -1,10 +1,10 @@
-from azure.storage.fileshare import ShareServiceClient
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_clients import get_service_client
 
 def list_shares_in_service(_account_name, _connection_string):
     output = []
     try:
-        # Instantiate the ShareServiceClient from a connection string
-        file_service = ShareServiceClient.from_connection_string(_connection_string)
+        # Shared ShareServiceClient of the connection string
+        file_service = get_service_client(_connection_string)
         # List the shares in the file service
         my_shares = list(file_service.list_shares())
         output = [share['name'] for share in my_shares if share]
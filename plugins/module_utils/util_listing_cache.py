@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+from datetime import datetime
+
+# Listings are kept on local disk so every task of a play run on the same host can reuse them.
+# The directory is private to the user running the modules, other users can neither read nor plant entries
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ansible", "tmp", "o4n_azure_fileshare_cache")
+
+
+def cache_dir():
+    # Returns CACHE_DIR, None when it can not be trusted: it must be a real directory,
+    # not a link, owned by the current user with mode 0700
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.lstat(CACHE_DIR)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        return None
+    return CACHE_DIR
+
+
+def account_from_connection_string(_connection_string):
+    for part in _connection_string.split(";"):
+        key, separator, value = part.partition("=")
+        if key.strip().lower() == "accountname":
+            return value.strip()
+    return hashlib.sha256(_connection_string.encode()).hexdigest()
+
+
+def cache_file(_cache_dir, _connection_string, _share, _dir):
+    # One cache file per account, share and path
+    key = "\n".join([account_from_connection_string(_connection_string), _share, _dir.strip("/")])
+    return os.path.join(_cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+
+def encode_value(_value):
+    if isinstance(_value, datetime):
+        return {"$date": _value.isoformat()}
+    raise TypeError(f"Object of type {type(_value).__name__} is not JSON serializable")
+
+
+def decode_value(_value):
+    if "$date" in _value:
+        return datetime.fromisoformat(_value["$date"])
+    return _value
+
+
+def get_cached_listing(_connection_string, _share, _dir, _include, _ttl):
+    # Returns the cached files of the path, None when there is no valid entry for the requested include options
+    directory = cache_dir()
+    if directory is None:
+        return None
+    try:
+        with open(cache_file(directory, _connection_string, _share, _dir), "r") as cached:
+            listing = json.load(cached, object_hook=decode_value)
+    except (OSError, ValueError):
+        return None
+    if time.time() - listing["created"] > _ttl or not set(_include or []) <= set(listing["include"]):
+        return None
+    return listing["files"]
+
+
+def set_cached_listing(_connection_string, _share, _dir, _include, _files):
+    directory = cache_dir()
+    if directory is None:
+        return
+    file_name = cache_file(directory, _connection_string, _share, _dir)
+    # Write to a temporary file first so a concurrent task never reads a partial entry
+    descriptor, temp_file = tempfile.mkstemp(dir=directory)
+    with os.fdopen(descriptor, "w") as cached:
+        json.dump({"created": time.time(), "include": list(_include or []), "files": _files}, cached, default=encode_value)
+    os.replace(temp_file, file_name)
+
+
+def invalidate_listing(_connection_string, _share, _dir):
+    # Called by every module that changes the content of a path
+    directory = cache_dir()
+    if directory is None:
+        return
+    try:
+        os.remove(cache_file(directory, _connection_string, _share, _dir))
+    except OSError:
+        pass
@@ -1,59 +1,122 @@
+import os
 import re
+from fnmatch import translate
+from functools import lru_cache
 
-def select_files(_file_pattern, _files_in_dir):
+# Patterns that select every file, '*.*' also selects names without extension
+MATCH_ALL_PATTERNS = ("*", "*.*")
+WILDCARDS = ("*", "?", "[")
+
+
+def split_single_star(_file_pattern):
+    # Returns (prefix, suffix) for patterns with one '*' and no other wildcard, otherwise None
+    if "?" in _file_pattern or "[" in _file_pattern or _file_pattern.count("*") != 1:
+        return None
+    prefix, suffix = _file_pattern.split("*")
+    return prefix, suffix
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(_file_pattern):
+    # Build, once per pattern, a test that checks a file name with a single operation.
+    # Simple patterns become string comparisons, the rest a compiled glob regex
+    if _file_pattern in MATCH_ALL_PATTERNS:
+        return lambda file: True
+    if not any(wildcard in _file_pattern for wildcard in WILDCARDS):  # file.txt
+        return lambda file: file == _file_pattern
+    parts = split_single_star(_file_pattern)
+    if parts:
+        prefix, suffix = parts
+        if not suffix:  # file*
+            return lambda file: file.startswith(prefix)
+        if not prefix:  # *.txt
+            return lambda file: file.endswith(suffix)
+        min_length = len(prefix) + len(suffix)  # file*.txt
+        return lambda file: len(file) >= min_length and file.startswith(prefix) and file.endswith(suffix)
+    return re.compile(translate(_file_pattern)).match  # file?.t*, [ab]*.log, *.tar.*
+
+
+@lru_cache(maxsize=None)
+def compile_patterns(_file_patterns):
+    # Build one test for a tuple of patterns. Patterns are indexed so the cost of a name
+    # does not grow with the number of patterns:
+    # - literal names go to a set
+    # - '*suffix' patterns are grouped by the last extension of the suffix
+    # - 'prefix*' patterns are grouped by prefix length
+    # - everything else is merged in a single regex
+    if len(_file_patterns) == 1:
+        return compile_pattern(_file_patterns[0])
+    names = set()
+    suffixes = {}
+    prefixes = {}
+    others = []
+    for pattern in _file_patterns:
+        parts = split_single_star(pattern)
+        if pattern in MATCH_ALL_PATTERNS:
+            return lambda file: True
+        elif not any(wildcard in pattern for wildcard in WILDCARDS):
+            names.add(pattern)
+        elif parts and not parts[0] and "." in parts[1]:
+            suffixes.setdefault(parts[1].rsplit(".", 1)[1], []).append(parts[1])
+        elif parts and not parts[1]:
+            prefixes.setdefault(len(parts[0]), set()).add(parts[0])
+        else:
+            others.append(pattern)
+    regex = re.compile("|".join(translate(pattern) for pattern in others)).match if others else None
+
+    def match(file):
+        if file in names:
+            return True
+        if suffixes and "." in file:
+            for suffix in suffixes.get(file.rsplit(".", 1)[1], ()):
+                if file.endswith(suffix):
+                    return True
+        for length, prefix_set in prefixes.items():
+            if file[:length] in prefix_set:
+                return True
+        return regex is not None and regex(file) is not None
+
+    return match
+
+
+def as_patterns(_file_pattern):
+    # files and exclude options accept one pattern or a list of patterns
+    if not _file_pattern:
+        return ()
+    if isinstance(_file_pattern, str):
+        return (_file_pattern,)
+    return tuple(_file_pattern)
+
+
+def pattern_list(_option):
+    # files and exclude options are raw, a string is a single pattern even when it holds a comma, like 'file[a,b].txt'
+    return [str(pattern) for pattern in as_patterns(_option)]
+
+
+def literal_prefix(_file_pattern):
+    # Longest literal prefix shared by all the patterns, used to let the service filter the listing.
+    # Empty when any pattern can start with any character
+    prefixes = []
+    for pattern in as_patterns(_file_pattern):
+        if pattern in MATCH_ALL_PATTERNS:
+            return ""
+        positions = [pattern.index(wildcard) for wildcard in WILDCARDS if wildcard in pattern]
+        prefixes.append(pattern[:min(positions)] if positions else pattern)
+    return os.path.commonprefix(prefixes) if prefixes else ""
+
+
+def select_files(_file_pattern, _files_in_dir, _exclude=None):
     msg_ret = f"Files selection done for <{_file_pattern}>"
     status = True
-    name_and_exension_pattern = re.split(r"\.", _file_pattern)
-    pattern_file_ext = name_and_exension_pattern[1] if len(name_and_exension_pattern) == 2 else []
-    pattern_file_name = name_and_exension_pattern[0]
     try:
-        if _file_pattern == "*.*":  # *.*
-            return status, msg_ret, _files_in_dir
-        elif len(name_and_exension_pattern) == 1:  # file*
-            file_name_pattern = re.split(r"\*", pattern_file_name)[0]
-            return status, msg_ret, [file for file in _files_in_dir if re.split(r"\.", file)[0].startswith(file_name_pattern)]
-        elif len(name_and_exension_pattern) == 2:
-            if pattern_file_name.startswith("*") and not "*" in pattern_file_ext:  # *.txt
-                return status, msg_ret, [file for file in _files_in_dir if len(re.split(r"\.", file)) == 2 and
-                                            pattern_file_ext == re.split(r"\.", file)[1]]
-            elif pattern_file_ext.startswith("*") and not "*" in pattern_file_name:  # file.*
-                return status, msg_ret, [file for file in _files_in_dir if pattern_file_name == re.split(r"\.", file)[0]]
-            elif "*" in pattern_file_name and not "*" in pattern_file_ext:  # file*.txt
-                name_pattern = re.split(r"\*", pattern_file_name)[0]
-                return status, msg_ret, [file for file in _files_in_dir if
-                                            len(re.split(r"\.", file)) == 2 and file.startswith(name_pattern) and
-                                            pattern_file_ext == re.split(r"\.", file)[1]]
-            elif not "*" in pattern_file_name and "*" in pattern_file_ext:  # file.t*
-                file_ext_pattern = re.split(r"\*", pattern_file_ext)[0]
-                return status, msg_ret, [file for file in _files_in_dir if pattern_file_name == re.split(r"\.", file)[0]
-                                            and len(re.split(r"\.", file)) == 2 and 
-                                            file_ext_pattern in re.split(r"\.", file)[1]]
-            elif "*" in pattern_file_name and "*" in pattern_file_ext:  # file*.t*
-                file_name_pattern = re.split(r"\*", pattern_file_name)[0]
-                file_ext_pattern = re.split(r"\*", pattern_file_ext)[0]
-                return status, msg_ret, [file for file in _files_in_dir if re.split(r"\.", file)[0].startswith(file_name_pattern)
-                                            and re.split(r"\.", file)[1].startswith(file_ext_pattern)]
-            elif "*" in pattern_file_name and pattern_file_ext == "*":  # file*.*
-                file_name_pattern = re.split(r"\*", pattern_file_name)[0]
-                file_ext_pattern = pattern_file_ext
-                return status, msg_ret, [file for file in _files_in_dir if
-                                            re.split(r"\.", file)[0].startswith(file_name_pattern)
-                                            and re.split(r"\.", file)[1] == "*"]
-            elif not "*" in pattern_file_name and not "*" in pattern_file_ext:  # file.txt
-                file_name_pattern = pattern_file_name
-                file_ext_pattern = pattern_file_ext
-                return status, msg_ret, [file for file in _files_in_dir if file_name_pattern == re.split(r"\.", file)[0]
-                                            and len(re.split(r"\.", file)) == 2 and 
-                                            file_ext_pattern == re.split(r"\.", file)[1]]
-            else:
-                status = False
-                msg_ret = f"Invalid file name: <{_file_pattern}>"
-                return status, msg_ret, []
-        else:
-            status = False
-            msg_ret = f"Invalid file name: <{_file_pattern}>"
-            return status, msg_ret, []
+        # All patterns are checked in a single pass over the listing
+        include = compile_patterns(as_patterns(_file_pattern))
+        exclude_patterns = as_patterns(_exclude)
+        if exclude_patterns:
+            exclude = compile_patterns(exclude_patterns)
+            return status, msg_ret, [file for file in _files_in_dir if include(file) and not exclude(file)]
+        return status, msg_ret, [file for file in _files_in_dir if include(file)]
     except Exception as error:
         status = False
         msg_ret = f"Files selection failed for <{_file_pattern}> pattern, error: <{error.args}>"
-        return status, msg_ret, []
\ No newline at end of file
+        return status, msg_ret, []
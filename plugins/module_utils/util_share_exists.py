@@ -0,0 +1,26 @@
+import azure.core.exceptions as aze
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_clients import get_share_client
+
+# Result of every share checked, kept for the lifetime of the module process
+_checked_shares = {}
+
+
+def share_exists(_account_name, _connection_string, _share):
+    # Check one share with a single Get Share Properties request instead of listing every share in the account
+    key = (_connection_string, _share)
+    if key not in _checked_shares:
+        try:
+            get_share_client(_connection_string, _share).get_share_properties()
+            _checked_shares[key] = True
+        except aze.ResourceNotFoundError:
+            _checked_shares[key] = False
+        except Exception as error:
+            status = False
+            msg_ret = f"Share <{_share}> not checked in account <{_account_name}>. Error: <{error}>"
+            return status, msg_ret, False
+    if _checked_shares[key]:
+        msg_ret = f"Share <{_share}> found in account <{_account_name}>"
+    else:
+        msg_ret = f"Share <{_share}> not found in account <{_account_name}>"
+
+    return True, msg_ret, _checked_shares[key]
@@ -0,0 +1,72 @@
+import json
+import os
+from datetime import datetime, timezone
+
+SYNC_MODES = ["none", "size", "timestamp"]
+DOWNLOAD_SYNC_MODES = SYNC_MODES + ["etag"]
+DEFAULT_STATE_FILE = ".o4n_azure_fileshare_sync.json"
+
+
+def local_last_modified(_local_file):
+    return datetime.fromtimestamp(os.path.getmtime(_local_file), tz=timezone.utc)
+
+
+def as_utc(_date):
+    # Listing dates may come without time zone, they are always UTC
+    return _date if _date.tzinfo else _date.replace(tzinfo=timezone.utc)
+
+
+def upload_needed(_local_file, _remote_file, _sync_mode):
+    # size: upload new files and files whose size changed
+    # timestamp: also upload files modified locally after the last change in the share
+    if _sync_mode == "none" or _remote_file is None:
+        return True
+    if os.path.getsize(_local_file) != _remote_file['size']:
+        return True
+    if _sync_mode == "timestamp":
+        return _remote_file.get('last_modified') is None or \
+            local_last_modified(_local_file) > as_utc(_remote_file['last_modified'])
+    return False
+
+
+def download_needed(_local_file, _remote_file, _sync_mode, _state=None):
+    # size: download files missing locally and files whose size changed
+    # timestamp: also download files changed in the share after the local copy was written
+    # etag: also download files whose ETag differs from the one saved in the state file
+    if _sync_mode == "none" or not os.path.isfile(_local_file):
+        return True
+    if os.path.getsize(_local_file) != _remote_file['size']:
+        return True
+    if _sync_mode == "timestamp":
+        return _remote_file.get('last_modified') is None or \
+            as_utc(_remote_file['last_modified']) > local_last_modified(_local_file)
+    if _sync_mode == "etag":
+        return _state is None or _state.get('etag') != _remote_file.get('etag')
+    return False
+
+
+def sync_state_key(_account_name, _share, _remote_file):
+    # Several accounts and shares can be synced to the same local_path, each one keeps its own entries
+    return f"{_account_name}/{_share}/{_remote_file}"
+
+
+def without_state_file(_file_names):
+    # The default state file lives in local_path, it is never selected for upload
+    return [file_name for file_name in _file_names if file_name != DEFAULT_STATE_FILE]
+
+
+def load_sync_state(_state_file):
+    try:
+        with open(_state_file, "r") as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sync_state(_state_file, _state):
+    # Write to a temporary file first so an interrupted run never leaves a broken state file
+    os.makedirs(os.path.dirname(_state_file) or ".", exist_ok=True)
+    temp_file = _state_file + ".tmp"
+    with open(temp_file, "w") as state_file:
+        json.dump(_state, state_file)
+    os.replace(temp_file, _state_file)
@@ -0,0 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_in_pool(_worker, _items, _max_concurrency):
+    # Run _worker for every item using up to _max_concurrency threads.
+    # Results are returned in the same order as _items
+    items = list(_items)
+    if _max_concurrency <= 1 or len(items) <= 1:
+        return [_worker(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(_max_concurrency, len(items))) as executor:
+        return list(executor.map(_worker, items))
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Azure Files accepts up to 4 MiB per Put Range request
+MAX_RANGE_SIZE = 4 * 1024 * 1024
+
+
+def delete_partial_file(_file_client):
+    # A remote file with gaps has the full size and a recent last_modified, sync modes would never upload it again
+    try:
+        _file_client.delete_file()
+    except Exception:
+        pass
+
+
+def upload_file_in_ranges(_file_client, _source_file, _range_size, _max_connections):
+    with open(_source_file, "rb") as source_file:
+        fd = source_file.fileno()
+        file_size = os.fstat(fd).st_size
+        offsets = range(0, file_size, _range_size)
+        # Create the file at its final size, then fill it range by range
+        _file_client.create_file(size=file_size)
+
+        def upload_range(offset):
+            length = min(_range_size, file_size - offset)
+            # pread does not move the shared file pointer, so workers need no lock
+            _file_client.upload_range(os.pread(fd, length, offset), offset=offset, length=length)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(_max_connections, len(offsets))) as executor:
+                list(executor.map(upload_range, offsets))
+        except Exception:
+            delete_partial_file(_file_client)
+            raise
+
+
+def upload_local_file(_file_client, _source_file, _range_size=MAX_RANGE_SIZE, _max_connections=1):
+    # Large files are sent as concurrent ranges, the rest use a plain upload
+    if _max_connections > 1 and os.path.getsize(_source_file) > _range_size:
+        upload_file_in_ranges(_file_client, _source_file, _range_size, _max_connections)
+    else:
+        with open(_source_file, "rb") as source_file:
+            # upload_file also creates the file at its final size before sending the ranges
+            try:
+                _file_client.upload_file(source_file)
+            except Exception:
+                delete_partial_file(_file_client)
+                raise
+
+
+def upload_file(_share, _source_file, _dest_file, _range_size=MAX_RANGE_SIZE, _max_connections=1):
+    # Worker used by the upload pools, returns the error instead of raising it
+    try:
+        file = _share.get_file_client(_dest_file)
+        upload_local_file(file, _source_file, _range_size, _max_connections)
+        return None
+    except Exception as error:
+        return str(error)
@@ -0,0 +1,93 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import azure.core.exceptions as aze
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_share_exists import share_exists
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_clients import get_share_client
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_list_files import file_entry
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_list_directories import directory_entry
+
+
+def list_directory(_share_client, _dir, _include=None):
+    # List one directory, returns its sub directories and its files
+    directories = []
+    files = []
+    for entry in _share_client.list_directories_and_files(directory_name=_dir, include=_include):
+        if entry['is_directory']:
+            directories.append(directory_entry(entry))
+        else:
+            files.append(file_entry(entry, _include))
+    return directories, files
+
+
+def walk_share(_share_client, _dir, _max_concurrency=1, _include=None):
+    # Walk the tree under _dir, one directory per work item and at most _max_concurrency listings in flight.
+    # A directory is queued as soon as its parent is listed, there is no wait between levels.
+    # Yields (relative directory, directories, files) in completion order, relative directories end with "/"
+    base_dir = _dir + "/" if _dir else ""
+    waiting = deque([""])
+    with ThreadPoolExecutor(max_workers=max(1, _max_concurrency)) as executor:
+        running = {}
+        while waiting or running:
+            while waiting and len(running) < max(1, _max_concurrency):
+                rel_dir = waiting.popleft()
+                running[executor.submit(list_directory, _share_client, (base_dir + rel_dir).rstrip("/"), _include)] = rel_dir
+            done, not_done = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir = running.pop(future)
+                directories, files = future.result()
+                waiting.extend(rel_dir + directory['name'] + "/" for directory in directories)
+                yield rel_dir, directories, files
+
+
+def list_files_in_tree(_account_name, _connection_string, _share, _dir, _print_path, _max_concurrency=1, _include=None):
+    # Flat list of every file under _dir, "path" is relative to _dir
+    output = []
+    status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+    if not share_exist:
+        msg_ret = f"Invalid File Share name: <{_share}>. Share does not exist in Account Storage <{_account_name}>"
+        return False, msg_ret, output
+    share = get_share_client(_connection_string, _share, _max_concurrency)
+    try:
+        for rel_dir, directories, files in walk_share(share, _dir, _max_concurrency, _include):
+            output += [dict(file, path=rel_dir + file['name']) for file in files]
+        output.sort(key=lambda file: file['path'])
+        status = True
+        if len(output) == 0:
+            msg_ret = f"No Files found under path <{_print_path}> in share <{_share}>"
+        else:
+            msg_ret = f"List of Files created under path <{_print_path}> in share <{_share}>"
+    except aze.ResourceNotFoundError:
+        msg_ret = f"No files to list under path <{_print_path}> in share <{_share}> ,path not found"
+        status = False
+    except Exception as error:
+        status = False
+        msg_ret = f"List of Files not created under path <{_print_path}> in share <{_share}>. Error: <{error}>"
+
+    return status, msg_ret, output
+
+
+def list_directories_in_tree(_account_name, _connection_string, _share, _dir, _print_path, _max_concurrency=1):
+    # Flat list of every directory under _dir, "path" is relative to _dir
+    output = []
+    status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+    if not share_exist:
+        msg_ret = f"List of Directories not created for path <{_print_path}> in share <{_share}>. Error: Share not found"
+        return False, msg_ret, output
+    share = get_share_client(_connection_string, _share, _max_concurrency)
+    try:
+        for rel_dir, directories, files in walk_share(share, _dir, _max_concurrency):
+            output += [dict(directory, path=rel_dir + directory['name']) for directory in directories]
+        output.sort(key=lambda directory: directory['path'])
+        status = True
+        if len(output) == 0:
+            msg_ret = f"No Directories found under path <{_print_path}> in share <{_share}>"
+        else:
+            msg_ret = f"List of Directories created under path <{_print_path}> in share <{_share}>"
+    except aze.ResourceNotFoundError:
+        msg_ret = f"List of Directories not created under path <{_print_path}> in share <{_share}>. Error: path not found"
+        status = False
+    except Exception as error:
+        status = False
+        msg_ret = f"List of Directories not created under path <{_print_path}> in share <{_share}>. Error: <{error}>"
+
+    return status, msg_ret, output
@@ -44,19 +44,67 @@ options:
     type: string
   files:
     description:
-      files to deleted from File ShRE
+      - files to deleted from File ShRE
+      - Glob pattern, supports several '*', '?', '[...]' and names with more than one dot
+      - '*.*' selects every file, with or without extension
+      - One pattern or a list of patterns, all of them are checked in a single pass over the listing
+      - A string is always a single pattern, commas included, use a list to give several patterns
     required: true
-    choices:
-      - 'file*'
-      - 'file*.txt'
-      - 'file*.tx*'
-      - 'file*.*'
-      - file.tx*
-      - '*.txt'
-      - 'file.*'
-      - '*.*'
-      - 'file.txt'
+    type: raw
+  exclude:
+    description:
+      - Patterns of files that must not be selected, even if they match files
+      - Same syntax as files, one pattern or a list of patterns
+    required: false
+    type: raw
+  cache_ttl:
+    description:
+      - Seconds a listing of path is reused from the on-disk cache of the host, 0 disables the cache
+      - The cached listing of path is dropped once files are deleted
+    required: false
+    type: int
+    default: 0
+  max_concurrency:
+    description:
+      - Maximum number of files deleted in parallel
+      - Deletion starts with the first page of the listing, a failed file does not stop the others
+      - Files not deleted are returned in failed_files with their error
+    required: false
+    type: int
+    default: 1
+  older_than:
+    description:
+      - Select only files last modified before this age, a number followed by s, m, h, d or w, seconds by default
+      - Age, size and name filters are checked on the same listing, no per file property request is made
+    required: false
+    type: string
+  newer_than:
+    description:
+      - Select only files last modified within this age, same syntax as older_than
+    required: false
+    type: string
+  min_size:
+    description:
+      - Select only files of at least this size, in bytes or with a unit like 10K, 5M or 1G
+    required: false
     type: string
+  max_size:
+    description:
+      - Select only files of at most this size, same syntax as min_size
+    required: false
+    type: string
+  engine:
+    description:
+      - thread, deletions run on a pool of max_concurrency threads and start with the first page of the listing
+      - async, deletions run on a single thread with asyncio and the aio clients of the SDK, with up to
+        max_concurrency requests in flight, once the listing is complete
+      - async requires azure-storage-file-share[aio] (aiohttp)
+    required: false
+    type: string
+    choices:
+      - thread
+      - async
+    default: thread
 """
 
 RETURN = """
@@ -73,8 +121,20 @@ output:
           "o4n_azure_list_shares.py"
       ],
       "failed": false,
+      "failed_files": [],
       "msg": "File deleted from Directory </dir1> in share <share-to-test2>"
     }
+failed_files:
+  description: List of files not deleted, with the error returned for each one
+  type: list
+  returned: allways
+  sample:
+    "failed_files": [
+        {
+            "name": "o4n_azure_list_files.py",
+            "error": "The specified resource is marked for deletion by an SMB client."
+        }
+    ]
 """
 
 EXAMPLES = """
@@ -95,68 +155,135 @@ tasks:
       connection_string: "{{ connection_string }}"
       files: file*.*
     register: output
+
+  - name: Delete config and backup files, keeping temporary ones
+    o4n_azure_delete_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      path: /dir1
+      files:
+        - "*.cfg"
+        - "*.bak"
+      exclude:
+        - "tmp*"
+    register: output
+
+  - name: Delete rotated logs, 32 files at a time
+    o4n_azure_delete_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      path: /logs
+      files: "*.log.*"
+      max_concurrency: 32
+    register: output
+
+  - name: Retention, delete backups older than 30 days
+    o4n_azure_delete_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      path: /backups
+      files: "*.tar.gz"
+      older_than: 30d
+      max_concurrency: 16
+    register: output
+
+  - name: Delete tens of thousands of rotated logs from one thread
+    o4n_azure_delete_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      path: /logs
+      files: "*.log.*"
+      engine: async
+      max_concurrency: 1000
+    register: output
 """
 
-from azure.storage.fileshare import ShareClient
+from concurrent.futures import ThreadPoolExecutor
 import azure.core.exceptions as aze
-from ansible.module_utils.basic import AnsibleModule
-from ..module_utils.util_list_shares import list_shares_in_service
-from ..module_utils.util_list_files import list_files_in_share
-from ..module_utils.util_select_files_pattern import select_files
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ..module_utils.util_share_exists import share_exists
+from ..module_utils.util_list_files import iter_cached_files_in_share
+from ..module_utils.util_listing_cache import invalidate_listing
+from ..module_utils.util_file_filter import file_filter
+from ..module_utils.util_clients import get_share_client
+from ..module_utils.util_async_engine import async_delete_files, HAS_AIO, AIO_IMPORT_ERROR, AIO_REQUIREMENT, ENGINES
+from ..module_utils.util_select_files_pattern import select_files, pattern_list, literal_prefix
 from ..module_utils.util_get_right_path import right_path
+from ..module_utils.util_delete_file import delete_file
+
 
-def delete_files(_account_name, _connection_string, _share, _path, _files):
+def delete_files(_account_name, _connection_string, _share, _path, _files, _exclude=None, _cache_ttl=0, _max_concurrency=1,
+                 _file_filter=None, _engine="thread"):
     _path, print_path = right_path(_path)
     found_files = []
+    report = {"failed_files": []}
     # check if share and path exist in Account Storage
     try:
-      status, msg_ret, output = list_shares_in_service(_account_name, _connection_string)
+      status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
       if status:
-          share_exist = [share for share in output if share == _share]
-          if len(share_exist) != 1:
+          if not share_exist:
               status = False
               msg_ret = f"Invalid File Share name: <{_share}>. Share does not exist in Account Storage <{_account_name}>"
-              return status, msg_ret, found_files
+              return status, msg_ret, found_files, report
     except Exception as error:
         status = False
         msg_ret = f"Invalid File Share name: <{_share}>. Listing Shares process failed"
-        return (status, msg_ret, found_files)
+        return (status, msg_ret, found_files, report)
     # Delete files
+    pending = []
     try:
-      # Instantiate the ShareFileClient from a connection string
-      share = ShareClient.from_connection_string(_connection_string, _share)
-      status, msg_ret, files_in_share = list_files_in_share(_account_name, _connection_string, _share, _path, print_path)
-      if status:
-          status, msg_ret, found_files = select_files(_files,
-                                          [file['name'] for file in files_in_share if file])
-          path = _path + "/" if _path else ""
-          if len(found_files) > 1:
-              for file_name in found_files:
-                  file = share.get_file_client(path + file_name)
-                  # delete the file
-                  file.delete_file()
-              status = True
-              msg_ret = f"File deleted from Directory <{print_path}> in share <{_share}>"
-          elif len(found_files) == 1:
-              file = share.get_file_client(path + found_files[0])
-              # delete the file
-              file.delete_file()
-              status = True
-              msg_ret = f"File deleted from Directory <{print_path}> in share <{_share}>"
+      # Shared ShareClient, with a connection per worker
+      share = get_share_client(_connection_string, _share, _max_concurrency)
+      path = _path + "/" if _path else ""
+      # Age filters use the last modified date returned by the same listing
+      include = ["timestamps"] if _file_filter else None
+      # Files of every page go to the pool as soon as the page is received, the listing is never held in memory.
+      # Only names starting with the literal prefix of the patterns are listed by the service
+      with ThreadPoolExecutor(max_workers=max(1, _max_concurrency)) as executor:
+          for files in iter_cached_files_in_share(share, _connection_string, _share, _path, include, literal_prefix(_files),
+                                                  _cache_ttl):
+              if _file_filter:
+                  files = [file for file in files if _file_filter(file)]
+              status, msg_ret, page_files = select_files(_files, [file['name'] for file in files], _exclude)
+              if not status:
+                  break
+              # The async engine runs once the listing is complete
+              pending += [(file_name, None if _engine == "async" else executor.submit(delete_file, share, path + file_name))
+                          for file_name in page_files]
+          if _engine == "async":
+              errors = async_delete_files(_connection_string, _share, [path + file_name for file_name, future in pending],
+                                          _max_concurrency)
           else:
-              status = True
-              msg_ret = f"Files not deleted from Directory <{print_path}> in share <{_share}>. No file to delete"
-      else:
-          msg_ret = f"Invalid Directory: <{print_path}> in File Share <{_share}>"
+              errors = [future.result() for file_name, future in pending]
+          # A failed file does not stop the others, results keep the listing order
+          for (file_name, future), error in zip(pending, errors):
+              if error:
+                  report["failed_files"].append({"name": file_name, "error": error})
+              else:
+                  found_files.append(file_name)
+      # status is False here only when the file selection failed, msg_ret already holds the error
+      if status and len(report["failed_files"]) > 0:
           status = False
+          msg_ret = f"<{len(report['failed_files'])}> Files not deleted from Directory <{print_path}> in share <{_share}>. See failed_files"
+      elif status and len(found_files) > 0:
+          msg_ret = f"File deleted from Directory <{print_path}> in share <{_share}>"
+      elif status:
+          msg_ret = f"Files not deleted from Directory <{print_path}> in share <{_share}>. No file to delete"
     except aze.ResourceNotFoundError:
-      msg_ret = f"File <{found_files}> not deleted from Directory <{print_path}> in share <{_share}>. Error: Resource not found"
+      msg_ret = f"Files not deleted from Directory <{print_path}> in share <{_share}>. Error: Resource not found"
       status = False
     except Exception as error:
       msg_ret = f"File <{found_files}> not deleted from Directory <{print_path}> in share <{_share}>. Error: <{error}>"
       status = False
+    # Cached listings of the path are no longer valid
+    if pending:
+        invalidate_listing(_connection_string, _share, _path)
 
-    return status, msg_ret, found_files
+    return status, msg_ret, found_files, report
 
 
 def main():
@@ -166,7 +293,15 @@ def main():
             share= dict(required=True, type='str'),
             connection_string=dict(required=True, type='str'),
             path=dict(required=False, type='str', default=''),
-            files=dict(required=True, type='str')
+            files=dict(required=True, type='raw'),
+            exclude=dict(required=False, type='raw', default=[]),
+            cache_ttl=dict(required=False, type='int', default=0),
+            max_concurrency=dict(required=False, type='int', default=1),
+            older_than=dict(required=False, type='str'),
+            newer_than=dict(required=False, type='str'),
+            min_size=dict(required=False, type='str'),
+            max_size=dict(required=False, type='str'),
+            engine=dict(required=False, type='str', choices=ENGINES, default='thread')
         )
     )
 
@@ -174,14 +309,28 @@ def main():
     connection_string = module.params.get("connection_string")
     account_name = module.params.get("account_name")
     path = module.params.get("path")
-    files = module.params.get("files")
+    files = pattern_list(module.params.get("files"))
+    exclude = pattern_list(module.params.get("exclude"))
+    cache_ttl = module.params.get("cache_ttl")
+    max_concurrency = module.params.get("max_concurrency")
+    engine = module.params.get("engine")
+
+    if engine == "async" and not HAS_AIO:
+        module.fail_json(failed=True, msg=missing_required_lib(AIO_REQUIREMENT), exception=AIO_IMPORT_ERROR)
+
+    try:
+        selection_filter = file_filter(module.params.get("older_than"), module.params.get("newer_than"),
+                                       module.params.get("min_size"), module.params.get("max_size"))
+    except ValueError as error:
+        module.fail_json(failed=True, msg=f"Invalid file filter. Error: <{error}>")
 
-    success, msg_ret, output = delete_files(account_name, connection_string, share, path, files)
+    success, msg_ret, output, report = delete_files(account_name, connection_string, share, path, files, exclude, cache_ttl,
+                                                    max_concurrency, selection_filter, engine)
 
     if success:
-        module.exit_json(failed=False, msg=msg_ret, content=output)
+        module.exit_json(failed=False, msg=msg_ret, content=output, **report)
     else:
-        module.fail_json(failed=True, msg=msg_ret, content=output)
+        module.fail_json(failed=True, msg=msg_ret, content=output, **report)
 
 
 if __name__ == "__main__":
@@ -39,19 +39,19 @@ options:
     type: string
   files:
     description:
-      files to deleted from File ShRE
+      - files to deleted from File ShRE
+      - Glob pattern, supports several '*', '?', '[...]' and names with more than one dot
+      - '*.*' selects every file, with or without extension
+      - One pattern or a list of patterns, all of them are checked in a single pass over the listing
+      - A string is always a single pattern, commas included, use a list to give several patterns
     required: true
-    choices:
-      - 'file*'
-      - 'file*.txt'
-      - 'file*.tx*'
-      - 'file*.*'
-      - file.tx*
-      - '*.txt'
-      - 'file.*'
-      - '*.*'
-      - 'file.txt'
-    type: str
+    type: raw
+  exclude:
+    description:
+      - Patterns of files that must not be selected, even if they match files
+      - Same syntax as files, one pattern or a list of patterns
+    required: false
+    type: raw
   source_path:
     description:
       path, directory, where files that must be downloaded are
@@ -61,6 +61,110 @@ options:
       path where the files will be downloaded
     required: false
     type: string
+  buffer_size:
+    description:
+      - Size in bytes of every chunk read from the File Share and written to the local file
+      - Memory used by a download stays around this size, whatever the size of the file
+    required: false
+    type: int
+    default: 4194304
+  max_concurrency:
+    description:
+      - Number of files downloaded in parallel, every file is written to its own local file
+      - Output list keeps the same order no matter the number of workers
+    required: false
+    type: int
+    default: 1
+  range_size:
+    description:
+      - Size in bytes of every range fetched when a file is downloaded in ranges
+    required: false
+    type: int
+    default: 4194304
+  max_connections:
+    description:
+      - Number of ranges of a single file downloaded in parallel
+      - When greater than 1, files bigger than range_size are preallocated locally at their final size and
+        every range is written at its own offset
+    required: false
+    type: int
+    default: 1
+  recursive:
+    description:
+      - Download the whole tree under source_path, the local Directory structure is created under local_path
+      - Directories are listed in parallel, up to max_concurrency at a time, while matched files are downloaded
+        by a second pool of max_concurrency workers, so up to twice max_concurrency requests can be in flight
+      - Content lists the downloaded files relative to source_path
+    required: false
+    type: bool
+    default: false
+  sync_mode:
+    description:
+      - Download only files that differ from the local copy, using the size, last modified date and ETag
+        returned by the listing
+      - none, download every matched file
+      - size, download files missing locally or with a different size
+      - timestamp, like size, and also files changed in the share after the local copy was written
+      - etag, like size, and also files whose ETag differs from the one saved in state_file by the last run
+      - Files not downloaded are returned in skipped_files
+    required: false
+    type: string
+    choices:
+      - none
+      - size
+      - timestamp
+      - etag
+    default: none
+  state_file:
+    description:
+      - Local file where the ETag of every downloaded file is saved when sync_mode is etag
+      - Default is .o4n_azure_fileshare_sync.json in local_path, o4n_azure_upload_files and
+        o4n_azure_upload_directory never select a file with that name
+      - Entries are kept per account and share, several shares can be synced to the same local_path
+    required: false
+    type: string
+  cache_ttl:
+    description:
+      - Seconds a listing of source_path is reused from the on-disk cache of the host, 0 disables the cache
+      - Not used when recursive is true
+    required: false
+    type: int
+    default: 0
+  older_than:
+    description:
+      - Select only files last modified before this age, a number followed by s, m, h, d or w, seconds by default
+      - Age, size and name filters are checked on the same listing, no per file property request is made
+    required: false
+    type: string
+  newer_than:
+    description:
+      - Select only files last modified within this age, same syntax as older_than
+    required: false
+    type: string
+  min_size:
+    description:
+      - Select only files of at least this size, in bytes or with a unit like 10K, 5M or 1G
+    required: false
+    type: string
+  max_size:
+    description:
+      - Select only files of at most this size, same syntax as min_size
+    required: false
+    type: string
+  engine:
+    description:
+      - thread, downloads run on a pool of max_concurrency threads and start with the first page of the listing
+      - async, downloads run on a single thread with asyncio and the aio clients of the SDK, with up to
+        max_concurrency requests in flight, once the listing is complete. Suited to many small files,
+        range_size and max_connections are not used
+      - With async, local files are read and written from a helper thread, disk access never stalls the transfers in flight
+      - async requires azure-storage-file-share[aio] (aiohttp)
+    required: false
+    type: string
+    choices:
+      - thread
+      - async
+    default: thread
 """
 
 RETURN = """
@@ -79,8 +183,29 @@ output:
           "o4n_azure_upload_files.py"
       ],
       "failed": false,
-      "msg": "Files downloaded to Directory </download_files> from share <share-to-test2>"
+      "failed_files": [],
+      "msg": "Files downloaded to Directory </download_files> from share <share-to-test2>",
+      "skipped_files": []
     }
+failed_files:
+  description: List of files not downloaded, with the error returned for each one
+  type: list
+  returned: allways
+  sample:
+    "failed_files": [
+        {
+            "name": "o4n_azure_upload_files.py",
+            "error": "The specified resource does not exist."
+        }
+    ]
+skipped_files:
+  description: List of files not downloaded because the local copy is up to date, when sync_mode is not none
+  type: list
+  returned: allways
+  sample:
+    "skipped_files": [
+        "o4n_azure_delete_files.py"
+    ]
 """
 
 EXAMPLES = """
@@ -120,71 +245,258 @@ tasks:
       connection_string: "{{ connection_string }}"
       files: file*.t*
     register: output
+
+  - name: Download device configs using 16 workers
+    o4n_azure_download_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /configs
+      files: "*.cfg"
+      local_path: /backup/configs
+      max_concurrency: 16
+    register: output
+
+  - name: Restore a large archive using 8 connections
+    o4n_azure_download_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /archives
+      files: "archive-2024.tar"
+      local_path: /restore
+      max_connections: 8
+    register: output
+
+  - name: Download a Directory tree
+    o4n_azure_download_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /configs
+      files: "*.cfg"
+      local_path: /backup/configs
+      recursive: true
+      max_concurrency: 16
+    register: output
+
+  - name: Download only files changed since the last run
+    o4n_azure_download_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /configs
+      files: "*.cfg"
+      local_path: /backup/configs
+      sync_mode: etag
+    register: output
+
+  - name: Download logs written in the last day, up to 100 MB each
+    o4n_azure_download_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /logs
+      files: "*.log"
+      local_path: /backup/logs
+      newer_than: 1d
+      max_size: 100M
+    register: output
+
+  - name: Download thousands of small files from one thread
+    o4n_azure_download_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /events
+      files: "*.json"
+      local_path: /data/events
+      engine: async
+      max_concurrency: 1000
+    register: output
 """
 
-from azure.storage.fileshare import ShareClient
-from ansible.module_utils.basic import AnsibleModule
-from ..module_utils.util_list_shares import list_shares_in_service
-from ..module_utils.util_list_files import list_files_in_share
-from ..module_utils.util_select_files_pattern import select_files
+import os
+from concurrent.futures import ThreadPoolExecutor
+import azure.core.exceptions as aze
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ..module_utils.util_share_exists import share_exists
+from ..module_utils.util_list_files import iter_cached_files_in_share
+from ..module_utils.util_select_files_pattern import select_files, pattern_list, literal_prefix
 from ..module_utils.util_get_right_path import right_path
+from ..module_utils.util_download_file import download_file, DEFAULT_BUFFER_SIZE, DEFAULT_RANGE_SIZE
+from ..module_utils.util_walk_share import walk_share
+from ..module_utils.util_file_filter import file_filter
+from ..module_utils.util_clients import get_share_client
+from ..module_utils.util_async_engine import async_download_files, HAS_AIO, AIO_IMPORT_ERROR, AIO_REQUIREMENT, ENGINES
+from ..module_utils.util_sync_files import download_needed, load_sync_state, save_sync_state, sync_state_key, DOWNLOAD_SYNC_MODES, \
+    DEFAULT_STATE_FILE
+
 
+def run_downloads(_connection_string, _share, _pending, _s_path, _l_path, _max_concurrency, _buffer_size, _engine):
+    # Error of every pending download, None when it succeeded. Thread downloads are already running
+    if _engine == "async":
+        return async_download_files(_connection_string, _share, [(_s_path + name, _l_path + name) for name, remote_file, future in _pending],
+                                    _max_concurrency, max_single_get_size=_buffer_size, max_chunk_get_size=_buffer_size)
+    return [future.result() for name, remote_file, future in _pending]
 
-def download_files(_account_name, _connection_string, _share, _source_path, _files, _local_path):
+
+def download_files(_account_name, _connection_string, _share, _source_path, _files, _local_path,
+                   _buffer_size=DEFAULT_BUFFER_SIZE, _max_concurrency=1, _range_size=DEFAULT_RANGE_SIZE,
+                   _max_connections=1, _sync_mode="none", _state_file="", _exclude=None, _cache_ttl=0, _file_filter=None,
+                   _engine="thread"):
     found_files=[]
+    report={"failed_files": [], "skipped_files": []}
     # casting some vars
     _source_path, print_path = right_path(_source_path)
     # check if share and path exist in Account Storage
     try:
-        status, msg_ret, output=list_shares_in_service(_account_name, _connection_string)
+        status, msg_ret, share_exist=share_exists(_account_name, _connection_string, _share)
         if status:
-            share_exist=[share for share in output if share == _share]
-            if len(share_exist) != 1:
+            if not share_exist:
                 status=False
                 msg_ret=f"Invalid File Share name: <{_share}>. Does not exist in Account Storage <{_account_name}>"
-                return (status, msg_ret, found_files)
+                return (status, msg_ret, found_files, report)
     except Exception as error:
         status=False
         msg_ret=f"Invalid File Share name: <{_share}>. Listing Shares process failed"
-        return (status, msg_ret, found_files)
+        return (status, msg_ret, found_files, report)
     # Download files
     try:
-        # Instantiate the ShareFileClient from a connection string
-        share=ShareClient.from_connection_string(_connection_string, _share)
-        status, msg_ret_pattern, files_in_share=list_files_in_share(_account_name, _connection_string, _share, _source_path, print_path)
-        if status:
-            status, msg_ret, found_files=select_files(_files,
-                                        [file['name'] for file in files_in_share if file])
-            l_path=_local_path + "/" if _local_path else ""
-            s_path=_source_path + "/" if _source_path else ""
-            if len(found_files) > 1:
-                for file_name in found_files:
-                    file=share.get_file_client(s_path + file_name)
-                    # Download the file
-                    with open(l_path + file_name, "wb") as data:
-                        stream = file.download_file()
-                        data.write(stream.readall())
-                status=True
-                msg_ret = f"Files downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>"
-            elif len(found_files) == 1:
-                file=share.get_file_client(s_path + found_files[0])
-                # Download the file
-                with open(l_path + found_files[0], "wb") as data:
-                    stream = file.download_file()
-                    data.write(stream.readall())
-                status = True
-                msg_ret = f"File downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. File pattern <{_files}>"
-            else:
-                status = False
-                msg_ret = f"Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. No file to download, File pattern <{_files}>"
+        # Shared ShareClient, with a connection for every range in flight
+        share=get_share_client(_connection_string, _share, _max_concurrency * _max_connections,
+                               max_single_get_size=_buffer_size, max_chunk_get_size=_buffer_size)
+        # Sync modes and age filters use the dates and ETag returned by the same listing
+        include=["timestamps", "etag"] if _sync_mode != "none" else ["timestamps"] if _file_filter else None
+        l_path=_local_path + "/" if _local_path else ""
+        s_path=_source_path + "/" if _source_path else ""
+        state_file=_state_file if _state_file else l_path + DEFAULT_STATE_FILE
+        sync_state=load_sync_state(state_file) if _sync_mode == "etag" else {}
+        pending=[]
+        # Every page of the listing goes to the pool as soon as it is received, downloads start
+        # while the next pages are fetched. Only names starting with the literal prefix of the patterns are listed
+        with ThreadPoolExecutor(max_workers=max(1, _max_concurrency)) as executor:
+            for files in iter_cached_files_in_share(share, _connection_string, _share, _source_path, include,
+                                                    literal_prefix(_files), _cache_ttl):
+                if _file_filter:
+                    files=[file for file in files if _file_filter(file)]
+                status, msg_ret, page_files=select_files(_files, [file['name'] for file in files], _exclude)
+                if not status:
+                    return status, msg_ret, found_files, report
+                remote_files={file['name']: file for file in files}
+                for file_name in page_files:
+                    # Files already identical in the local file system are skipped
+                    if not download_needed(l_path + file_name, remote_files[file_name], _sync_mode, sync_state.get(sync_state_key(_account_name, _share, s_path + file_name))):
+                        report["skipped_files"].append(file_name)
+                        continue
+                    # The async engine runs once the listing is complete
+                    future=None if _engine == "async" else executor.submit(download_file, share, s_path + file_name, l_path + file_name,
+                                                                           remote_files[file_name]['size'], _range_size, _max_connections)
+                    pending.append((file_name, remote_files[file_name], future))
+            errors=run_downloads(_connection_string, _share, pending, s_path, l_path, _max_concurrency, _buffer_size, _engine)
+            # Every worker writes its own local file, results keep the listing order
+            for (file_name, remote_file, future), error in zip(pending, errors):
+                if error:
+                    report["failed_files"].append({"name": file_name, "error": error})
+                else:
+                    found_files.append(file_name)
+                    sync_state[sync_state_key(_account_name, _share, s_path + file_name)]={"etag": remote_file.get('etag'), "size": remote_file['size']}
+        if _sync_mode == "etag" and len(found_files) > 0:
+            save_sync_state(state_file, sync_state)
+        if len(report["failed_files"]) > 0:
+            status=False
+            msg_ret = f"<{len(report['failed_files'])}> Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. See failed_files"
+        elif len(found_files) > 0:
+            status=True
+            msg_ret = f"Files downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. File pattern <{_files}>"
+        elif len(report["skipped_files"]) > 0:
+            status = True
+            msg_ret = f"Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. All files are up to date"
         else:
-            msg_ret = f"Invalid Directory: <{print_path}> in File Share <{_share}>"
             status = False
+            msg_ret = f"Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. No file to download, File pattern <{_files}>"
+    except aze.ResourceNotFoundError:
+        msg_ret = f"Invalid Directory: <{print_path}> in File Share <{_share}>"
+        status = False
     except Exception as error:
         msg_ret = f"Files not downloaded to Directory <{_local_path}>. File pattern <{_files}>. Error: <{error}>"
         status = False
 
-    return status, msg_ret, found_files
+    return status, msg_ret, found_files, report
+
+
+def download_tree(_account_name, _connection_string, _share, _source_path, _files, _local_path,
+                  _buffer_size=DEFAULT_BUFFER_SIZE, _max_concurrency=1, _range_size=DEFAULT_RANGE_SIZE,
+                  _max_connections=1, _sync_mode="none", _state_file="", _exclude=None, _file_filter=None,
+                  _engine="thread"):
+    downloaded_files=[]
+    report={"failed_files": [], "skipped_files": []}
+    _source_path, print_path = right_path(_source_path)
+    try:
+        status, msg_ret, share_exist=share_exists(_account_name, _connection_string, _share)
+        if not share_exist:
+            msg_ret=f"Invalid File Share name: <{_share}>. Does not exist in Account Storage <{_account_name}>"
+            return False, msg_ret, downloaded_files, report
+        # The listing workers of walk_share run next to the downloads, the connection pool holds both
+        share=get_share_client(_connection_string, _share, _max_concurrency * _max_connections + _max_concurrency,
+                               max_single_get_size=_buffer_size, max_chunk_get_size=_buffer_size)
+        l_path=_local_path + "/" if _local_path else ""
+        s_path=_source_path + "/" if _source_path else ""
+        include=["timestamps", "etag"] if _sync_mode != "none" else ["timestamps"] if _file_filter else None
+        state_file=_state_file if _state_file else l_path + DEFAULT_STATE_FILE
+        sync_state=load_sync_state(state_file) if _sync_mode == "etag" else {}
+        pending=[]
+        # Directories are listed in parallel, matched files go to the download pool as they are found
+        with ThreadPoolExecutor(max_workers=max(1, _max_concurrency)) as executor:
+            for rel_dir, directories, files in walk_share(share, _source_path, _max_concurrency, include):
+                if _file_filter:
+                    files=[file for file in files if _file_filter(file)]
+                status, msg_ret, found_files=select_files(_files, [file['name'] for file in files], _exclude)
+                if not status:
+                    return status, msg_ret, downloaded_files, report
+                if len(found_files) == 0:
+                    continue
+                os.makedirs(l_path + rel_dir, exist_ok=True)
+                remote_files={file['name']: file for file in files}
+                for file_name in found_files:
+                    rel_file=rel_dir + file_name
+                    if not download_needed(l_path + rel_file, remote_files[file_name], _sync_mode, sync_state.get(sync_state_key(_account_name, _share, s_path + rel_file))):
+                        report["skipped_files"].append(rel_file)
+                        continue
+                    future=None if _engine == "async" else executor.submit(download_file, share, s_path + rel_file, l_path + rel_file,
+                                                                           remote_files[file_name]['size'], _range_size, _max_connections)
+                    pending.append((rel_file, remote_files[file_name], future))
+            # Directories complete in any order, content is sorted by path
+            pending.sort(key=lambda item: item[0])
+            errors=run_downloads(_connection_string, _share, pending, s_path, l_path, _max_concurrency, _buffer_size, _engine)
+            for (rel_file, remote_file, future), error in zip(pending, errors):
+                if error:
+                    report["failed_files"].append({"name": rel_file, "error": error})
+                else:
+                    downloaded_files.append(rel_file)
+                    sync_state[sync_state_key(_account_name, _share, s_path + rel_file)]={"etag": remote_file.get('etag'), "size": remote_file['size']}
+        if _sync_mode == "etag":
+            save_sync_state(state_file, sync_state)
+        if len(report["failed_files"]) > 0:
+            status=False
+            msg_ret=f"<{len(report['failed_files'])}> Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. See failed_files"
+        elif len(downloaded_files) == 0 and len(report["skipped_files"]) > 0:
+            status=True
+            msg_ret=f"Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. All files are up to date"
+        elif len(downloaded_files) == 0:
+            status=False
+            msg_ret=f"Files not downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. No file to download, File pattern <{_files}>"
+        else:
+            status=True
+            msg_ret=f"Directory tree downloaded to Directory <{_local_path}> from path <{print_path}> in share <{_share}>. File pattern <{_files}>"
+    except aze.ResourceNotFoundError:
+        msg_ret=f"Invalid Directory: <{print_path}> in File Share <{_share}>"
+        status=False
+    except Exception as error:
+        msg_ret=f"Files not downloaded to Directory <{_local_path}>. File pattern <{_files}>. Error: <{error}>"
+        status=False
+
+    return status, msg_ret, downloaded_files, report
 
 
 def main():
@@ -194,8 +506,22 @@ def main():
             share=dict(required=True, type='str'),
             connection_string=dict(required=True, type='str'),
             source_path=dict(required=False, type='str', default=''),
-            files=dict(required=True, type='str'),
-            local_path=dict(required=False, type='str', default='')
+            files=dict(required=True, type='raw'),
+            exclude=dict(required=False, type='raw', default=[]),
+            local_path=dict(required=False, type='str', default=''),
+            buffer_size=dict(required=False, type='int', default=DEFAULT_BUFFER_SIZE),
+            max_concurrency=dict(required=False, type='int', default=1),
+            range_size=dict(required=False, type='int', default=DEFAULT_RANGE_SIZE),
+            max_connections=dict(required=False, type='int', default=1),
+            recursive=dict(required=False, type='bool', default=False),
+            sync_mode=dict(required=False, type='str', choices=DOWNLOAD_SYNC_MODES, default='none'),
+            state_file=dict(required=False, type='str', default=''),
+            cache_ttl=dict(required=False, type='int', default=0),
+            older_than=dict(required=False, type='str'),
+            newer_than=dict(required=False, type='str'),
+            min_size=dict(required=False, type='str'),
+            max_size=dict(required=False, type='str'),
+            engine=dict(required=False, type='str', choices=ENGINES, default='thread')
         )
     )
 
@@ -203,15 +529,44 @@ def main():
     share = module.params.get("share")
     connection_string = module.params.get("connection_string")
     source_path = module.params.get("source_path")
-    files = module.params.get("files")
+    files = pattern_list(module.params.get("files"))
+    exclude = pattern_list(module.params.get("exclude"))
     local_path = module.params.get("local_path")
+    buffer_size = module.params.get("buffer_size")
+    max_concurrency = module.params.get("max_concurrency")
+    range_size = module.params.get("range_size")
+    max_connections = module.params.get("max_connections")
+    recursive = module.params.get("recursive")
+    sync_mode = module.params.get("sync_mode")
+    state_file = module.params.get("state_file")
+    cache_ttl = module.params.get("cache_ttl")
+    engine = module.params.get("engine")
 
-    success, msg_ret, output=download_files(account_name, connection_string, share, source_path, files, local_path)
+    if buffer_size < 1:
+        module.fail_json(failed=True, msg=f"Invalid buffer_size <{buffer_size}>. Must be greater than 0")
+    if range_size < 1:
+        module.fail_json(failed=True, msg=f"Invalid range_size <{range_size}>. Must be greater than 0")
+    if engine == "async" and not HAS_AIO:
+        module.fail_json(failed=True, msg=missing_required_lib(AIO_REQUIREMENT), exception=AIO_IMPORT_ERROR)
+    try:
+        selection_filter=file_filter(module.params.get("older_than"), module.params.get("newer_than"),
+                                     module.params.get("min_size"), module.params.get("max_size"))
+    except ValueError as error:
+        module.fail_json(failed=True, msg=f"Invalid file filter. Error: <{error}>")
+
+    if recursive:
+        success, msg_ret, output, report=download_tree(account_name, connection_string, share, source_path, files, local_path,
+                                                       buffer_size, max_concurrency, range_size, max_connections, sync_mode,
+                                                       state_file, exclude, selection_filter, engine)
+    else:
+        success, msg_ret, output, report=download_files(account_name, connection_string, share, source_path, files, local_path,
+                                                        buffer_size, max_concurrency, range_size, max_connections, sync_mode,
+                                                        state_file, exclude, cache_ttl, selection_filter, engine)
 
     if success:
-        module.exit_json(failed=False, msg=msg_ret, content=output)
+        module.exit_json(failed=False, msg=msg_ret, content=output, **report)
     else:
-        module.fail_json(failed=True, msg=msg_ret, content=output)
+        module.fail_json(failed=True, msg=msg_ret, content=output, **report)
 
 
 if __name__ == "__main__":
@@ -42,6 +42,19 @@ options:
       path where the directories will be listed. If not present, path is the root of the File Share
     required: false
     type: string
+  recursive:
+    description:
+      - List the whole tree under path. Every entry carries its path relative to path
+      - Directories are listed in parallel, one Directory per request, with up to max_concurrency requests in flight
+    required: false
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Maximum number of Directory listings in flight when recursive is true
+    required: false
+    type: int
+    default: 1
 """
 
 RETURN = """
@@ -85,11 +98,22 @@ tasks:
       connection_string: "{{ connection_string }}"
       share: "{{ share }}"
     register: output
+
+  - name: List every Directory in the tree
+    o4n_azure_list_directories:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      share: "{{ share }}"
+      path: /dir1
+      recursive: true
+      max_concurrency: 32
+    register: output
 """
 
 
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.util_list_directories import list_directories_in_share
+from ..module_utils.util_walk_share import list_directories_in_tree
 from ..module_utils.util_get_right_path import right_path
 
 
@@ -100,6 +124,8 @@ def main():
             share=dict(required=True, type='str'),
             connection_string=dict(required=True, type='str'),
             path=dict(required=False, type='str'),
+            recursive=dict(required=False, type='bool', default=False),
+            max_concurrency=dict(required=False, type='int', default=1),
         )
     )
 
@@ -107,9 +133,14 @@ def main():
     connection_string = module.params.get("connection_string")
     account_name = module.params.get("account_name")
     path = module.params.get("path")
+    recursive = module.params.get("recursive")
+    max_concurrency = module.params.get("max_concurrency")
     path_sub, print_path = right_path(path)
 
-    success, msg_ret, output = list_directories_in_share(account_name, connection_string, share, path_sub, print_path)
+    if recursive:
+        success, msg_ret, output = list_directories_in_tree(account_name, connection_string, share, path_sub, print_path, max_concurrency)
+    else:
+        success, msg_ret, output = list_directories_in_share(account_name, connection_string, share, path_sub, print_path)
 
     if success:
         module.exit_json(failed=False, msg=msg_ret, content=output)
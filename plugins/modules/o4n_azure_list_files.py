@@ -42,6 +42,62 @@ options:
       path where the files will be listed
     required: false
     type: string
+  files:
+    description:
+      - Patterns of the files to list, same syntax as in o4n_azure_download_files. All files when not present
+      - The literal prefix shared by the patterns is sent to the service, so only candidate names are listed
+      - A string is always a single pattern, commas included, use a list to give several patterns
+    required: false
+    type: raw
+  recursive:
+    description:
+      - List the whole tree under path. Every entry carries its path relative to path
+      - Directories are listed in parallel, one Directory per request, with up to max_concurrency requests in flight
+    required: false
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Maximum number of Directory listings in flight when recursive is true
+    required: false
+    type: int
+    default: 1
+  include:
+    description:
+      - Extra properties returned for every file by the same listing request, no per file property lookup is done
+      - timestamps adds creation_time, last_access_time, last_write_time, change_time and last_modified
+      - etag adds etag
+      - attributes adds file_attributes
+    required: false
+    type: list
+    elements: str
+    choices:
+      - timestamps
+      - etag
+      - attributes
+  cache_ttl:
+    description:
+      - Seconds a listing is reused from the on-disk cache of the host, 0 disables the cache
+      - The cache is shared by every task of the play and dropped for a path when files are uploaded to it,
+        deleted from it or when the Directory is managed by this collection
+      - The cache lives in ~/.ansible/tmp of the user running the module, it is not used unless that
+        Directory is owned by the user with mode 0700
+      - Not used when recursive is true or engine is async
+    required: false
+    type: int
+    default: 0
+  engine:
+    description:
+      - thread, recursive listings run on a pool of max_concurrency threads
+      - async, listings run on a single thread with asyncio and the aio clients of the SDK, with up to
+        max_concurrency Directory listings in flight
+      - async requires azure-storage-file-share[aio] (aiohttp)
+    required: false
+    type: string
+    choices:
+      - thread
+      - async
+    default: thread
 """
 
 RETURN = """
@@ -104,11 +160,64 @@ tasks:
       share: "{{ share }}"
       path = /dir1/dir2
     register: output
+
+  - name: List backup files
+    o4n_azure_list_files:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      share: "{{ share }}"
+      path: /backups
+      files: "backup_2024*.tar"
+    register: output
+
+  - name: List every file in the tree
+    o4n_azure_list_files:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      share: "{{ share }}"
+      path: /dir1
+      recursive: true
+      max_concurrency: 32
+    register: output
+
+  - name: List files with timestamps and ETag
+    o4n_azure_list_files:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      share: "{{ share }}"
+      path: /dir1
+      include:
+        - timestamps
+        - etag
+    register: output
+
+  - name: List files, reuse the listing for 5 minutes
+    o4n_azure_list_files:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      share: "{{ share }}"
+      path: /dir1
+      cache_ttl: 300
+    register: output
+
+  - name: List a large tree from one thread
+    o4n_azure_list_files:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      share: "{{ share }}"
+      path: /dir1
+      recursive: true
+      engine: async
+      max_concurrency: 256
+    register: output
 """
 
-from ansible.module_utils.basic import AnsibleModule
-from ..module_utils.util_list_files import list_files_in_share
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ..module_utils.util_list_files import list_files_in_share, format_entries
+from ..module_utils.util_walk_share import list_files_in_tree
+from ..module_utils.util_async_engine import list_files_async, HAS_AIO, AIO_IMPORT_ERROR, AIO_REQUIREMENT, ENGINES
 from ..module_utils.util_get_right_path import right_path
+from ..module_utils.util_select_files_pattern import select_files, literal_prefix, pattern_list
 
 
 def main():
@@ -118,6 +227,12 @@ def main():
       share=dict(required=True, type='str'),
       connection_string=dict(required=True, type='str'),
       path=dict(required=False, type='str', default=''),
+      files=dict(required=False, type='raw', default=[]),
+      recursive=dict(required=False, type='bool', default=False),
+      max_concurrency=dict(required=False, type='int', default=1),
+      include=dict(required=False, type='list', elements='str', choices=["timestamps", "etag", "attributes"], default=[]),
+      cache_ttl=dict(required=False, type='int', default=0),
+      engine=dict(required=False, type='str', choices=ENGINES, default='thread'),
     )
   )
 
@@ -125,9 +240,31 @@ def main():
   connection_string = module.params.get("connection_string")
   account_name = module.params.get("account_name")
   path = module.params.get("path")
+  files = pattern_list(module.params.get("files"))
+  recursive = module.params.get("recursive")
+  max_concurrency = module.params.get("max_concurrency")
+  include = module.params.get("include") or None
+  cache_ttl = module.params.get("cache_ttl")
+  engine = module.params.get("engine")
   path_sub, print_path = right_path(path)
 
-  success, msg_ret, output = list_files_in_share(account_name, connection_string, share, path_sub, print_path)
+  if engine == "async" and not HAS_AIO:
+      module.fail_json(failed=True, msg=missing_required_lib(AIO_REQUIREMENT), exception=AIO_IMPORT_ERROR)
+
+  if engine == "async":
+      success, msg_ret, output = list_files_async(account_name, connection_string, share, path_sub, print_path, max_concurrency,
+                                                  include, recursive, None if recursive else literal_prefix(files))
+  elif recursive:
+      success, msg_ret, output = list_files_in_tree(account_name, connection_string, share, path_sub, print_path, max_concurrency,
+                                                     include)
+  else:
+      success, msg_ret, output = list_files_in_share(account_name, connection_string, share, path_sub, print_path,
+                                                     include, literal_prefix(files), cache_ttl)
+  if success and files:
+      success, msg_ret_pattern, found_files = select_files(files, [file['name'] for file in output])
+      found_files = set(found_files)
+      output = [file for file in output if file['name'] in found_files]
+  output = format_entries(output)
 
   if success:
       module.exit_json(failed=False, msg=msg_ret, content=output)
@@ -48,11 +48,46 @@ options:
       directory to create or delete
     required: true
     type: string
+  paths:
+    description:
+      - List of Directories to create or delete in a single task, instead of path
+      - Directories of the same depth are managed in parallel, up to max_concurrency at a time. Parents are
+        created before their children and deleted after them
+      - parent_path, parents and recursive apply to every Directory of the list
+      - Content returns one result per Directory, with its path, success and msg
+    required: false
+    type: list
+    elements: str
   parent_path:
     description:
       full parent path where directory will be created or deleted
     required: false
     type: string
+  recursive:
+    description:
+      - With state absent, delete the Directory with all its files and Sub Directories, like rm -r
+      - Files are deleted first, in parallel, then Directories from the deepest level up, the Directories
+        of one level in parallel
+      - Files and Directories not deleted are returned in failed_files and failed_directories
+    required: false
+    type: bool
+    default: false
+  parents:
+    description:
+      - With state present, create every missing Directory of the path, like mkdir -p
+      - The deepest Directory is created first, parents are only created when the service reports them missing,
+        so a path whose parents exist costs a single request
+      - An existing Directory is not an error
+    required: false
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Maximum number of listings and deletions in flight when recursive is true
+      - Maximum number of Directories managed in parallel when paths is set
+    required: false
+    type: int
+    default: 1
 """
 
 RETURN = """
@@ -67,6 +102,14 @@ output:
       "failed": false,
       "msg": "Sub Directory <dir3> <created> under Directory <dir1> in share <share-to-test2>"
     }
+failed_files:
+  description: Files not deleted when recursive is true, path relative to the Directory, with the error for each one
+  type: list
+  returned: when recursive is true and state is absent
+failed_directories:
+  description: Sub Directories not deleted when recursive is true, path relative to the Directory, with the error for each one
+  type: list
+  returned: when recursive is true and state is absent
 """
 
 EXAMPLES = """
@@ -135,21 +178,57 @@ tasks:
       parent_path: /dir1
       state: absent
     register: output
+
+  - name: Create a nested path and its missing parents
+    o4n_azure_manage_directory:
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      path: /a/b/c/d
+      parents: true
+    register: output
+
+  - name: Create the Directory skeleton of a customer
+    o4n_azure_manage_directory:
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      parent_path: /customers/acme
+      paths:
+        - /in
+        - /out
+        - /in/orders
+        - /in/invoices
+        - /out/reports
+      parents: true
+      max_concurrency: 16
+    register: output
+
+  - name: Delete a release tree with all its content
+    o4n_azure_manage_directory:
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      path: /releases/1.0
+      state: absent
+      recursive: true
+      max_concurrency: 32
+    register: output
 """
 
 
-from azure.storage.fileshare import ShareClient
 import azure.core.exceptions as aze
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.util_get_right_path import right_path
+from ..module_utils.util_listing_cache import invalidate_listing
+from ..module_utils.util_walk_share import walk_share
+from ..module_utils.util_thread_pool import run_in_pool
+from ..module_utils.util_clients import get_share_client, get_directory_client
+from ..module_utils.util_delete_file import delete_file, delete_directory
 
 
 
 def create_directory(_connection_string, _share, _directory, _state, _print_path):
     action = "none"
-    share = ShareClient.from_connection_string(_connection_string, _share)
     try:
-        new_directory = share.get_directory_client(directory_path=_directory)
+        new_directory = get_directory_client(_connection_string, _share, _directory)
         if _state.lower() == "present":
             action = "created"
             new_directory.create_directory()
@@ -168,14 +247,15 @@ def create_directory(_connection_string, _share, _directory, _state, _print_path
     except Exception as error:
         msg_ret = f"Error managing Directory <{_print_path}> in share <{_share}>. Error: <{error}>"
         status = False
+    # Cached listings of the Directory are no longer valid
+    invalidate_listing(_connection_string, _share, _directory)
 
     return status, msg_ret, _print_path
 
 def create_subdirectory(_connection_string, _share, _directory, _parent_directory, _state, _print_path, _print_path_parent):
-    share = ShareClient.from_connection_string(_connection_string, _share)
     action = "none"
     try:
-        parent_dir = share.get_directory_client(directory_path=_parent_directory)
+        parent_dir = get_directory_client(_connection_string, _share, _parent_directory)
         if _state.lower() == "present":
             action = "created"
             parent_dir.create_subdirectory(_directory)
@@ -193,38 +273,191 @@ def create_subdirectory(_connection_string, _share, _directory, _parent_director
     except Exception as error:
         msg_ret = f"Error managing Sub Directory <{_print_path}> in Parent Directory <{_print_path_parent}>, share <{_share}>. Error: <{error}>"
         status = False
+    invalidate_listing(_connection_string, _share, _parent_directory.rstrip("/") + "/" + _directory)
 
     return status, msg_ret, _print_path_parent + _print_path
 
 
+def create_directory_parents(_connection_string, _share, _directory, _print_path):
+    # mkdir -p: try the deepest Directory first and go up only while the parent is not found,
+    # a single request when the parents already exist. Missing levels are then created top down
+    share = get_share_client(_connection_string, _share)
+    parts = _directory.split("/")
+    depth = len(parts)
+    created = []
+    try:
+        while True:
+            try:
+                share.get_directory_client(directory_path="/".join(parts[:depth])).create_directory()
+                created.append("/".join(parts[:depth]))
+                break
+            except aze.ResourceExistsError:
+                break
+            except aze.ResourceNotFoundError as error:
+                # Only a missing parent is created, any other not found error such as a missing share is raised.
+                # The first level has no parent to create
+                if getattr(error, "error_code", None) != "ParentNotFound" or depth == 1:
+                    raise
+                depth -= 1
+        for level in range(depth + 1, len(parts) + 1):
+            try:
+                share.get_directory_client(directory_path="/".join(parts[:level])).create_directory()
+                created.append("/".join(parts[:level]))
+            except aze.ResourceExistsError:
+                pass
+        status = True
+        if len(created) > 0:
+            msg_ret = f"Directory <{_print_path}> <created> in share <{_share}>, <{len(created)}> levels created"
+        else:
+            msg_ret = f"Directory <{_print_path}> not <created>. The Directory already exist>"
+    except aze.ResourceNotFoundError:
+        status = False
+        msg_ret = f"Directory <{_print_path}> not <created> in share <{_share}>. Share not found>"
+    except Exception as error:
+        msg_ret = f"Error managing Directory <{_print_path}> in share <{_share}>. Error: <{error}>"
+        status = False
+
+    return status, msg_ret, _print_path
+
+
+def delete_tree(_connection_string, _share, _directory, _print_path, _max_concurrency=1):
+    # Delete a Directory with all its content: every file in parallel, then the Directories
+    # from the deepest level up, the Directories of one level in parallel
+    report = {"failed_files": [], "failed_directories": []}
+    share = get_share_client(_connection_string, _share, _max_concurrency)
+    base_dir = _directory + "/"
+    try:
+        files = []
+        levels = {}
+        for rel_dir, directories, dir_files in walk_share(share, _directory, _max_concurrency):
+            files += [rel_dir + file['name'] for file in dir_files]
+            for directory in directories:
+                rel_path = rel_dir + directory['name']
+                levels.setdefault(rel_path.count("/"), []).append(rel_path)
+        errors = run_in_pool(lambda rel_file: delete_file(share, base_dir + rel_file), files, _max_concurrency)
+        report["failed_files"] = [{"name": rel_file, "error": error} for rel_file, error in zip(files, errors) if error]
+        # Files directly under the Directory are gone even when the Directory itself is not deleted
+        invalidate_listing(_connection_string, _share, _directory)
+        for depth in sorted(levels, reverse=True):
+            errors = run_in_pool(lambda rel_path: delete_directory(share, base_dir + rel_path), levels[depth], _max_concurrency)
+            report["failed_directories"] += [{"name": rel_path, "error": error} for rel_path, error in zip(levels[depth], errors) if error]
+        for rel_dirs in levels.values():
+            for rel_path in rel_dirs:
+                invalidate_listing(_connection_string, _share, base_dir + rel_path)
+        if len(report["failed_files"]) > 0 or len(report["failed_directories"]) > 0:
+            status = False
+            msg_ret = f"Directory <{_print_path}> not <deleted> in share <{_share}>. See failed_files and failed_directories"
+        else:
+            status, msg_ret, output = create_directory(_connection_string, _share, _directory, "absent", _print_path)
+    except aze.ResourceNotFoundError:
+        status = False
+        msg_ret = f"Directory <{_print_path}> not <deleted> in share <{_share}>. The Directory does not exist>"
+    except Exception as error:
+        msg_ret = f"Error managing Directory <{_print_path}> in share <{_share}>. Error: <{error}>"
+        status = False
+
+    return status, msg_ret, _print_path, report
+
+
+def manage_directory(_connection_string, _share, _directory, _print_path, _state, _parents=False, _recursive=False,
+                     _max_concurrency=1):
+    # One Directory, full path from the root of the share
+    report = {}
+    if _recursive and _state == "absent":
+        status, msg_ret, output, report = delete_tree(_connection_string, _share, _directory, _print_path, _max_concurrency)
+    elif _parents and _state == "present":
+        status, msg_ret, output = create_directory_parents(_connection_string, _share, _directory, _print_path)
+    else:
+        status, msg_ret, output = create_directory(_connection_string, _share, _directory, _state, _print_path)
+
+    return status, msg_ret, output, report
+
+
+def manage_directories(_connection_string, _share, _directories, _state, _parents=False, _recursive=False,
+                       _max_concurrency=1):
+    # _directories is a list of (directory, print path). Directories of the same depth are independent and are
+    # managed in parallel, levels run parents first when creating and children first when deleting
+    # Size the connection pool of the shared client for the Directories in flight
+    get_share_client(_connection_string, _share, _max_concurrency)
+    levels = {}
+    for directory, print_path in _directories:
+        levels.setdefault(directory.count("/"), {})[directory] = print_path
+    results = {}
+    for depth in sorted(levels, reverse=_state == "absent"):
+        level = list(levels[depth].items())
+        outcomes = run_in_pool(lambda item: manage_directory(_connection_string, _share, item[0], item[1], _state, _parents,
+                                                             _recursive, _max_concurrency),
+                               level, _max_concurrency)
+        for (directory, print_path), (status, msg_ret, output, report) in zip(level, outcomes):
+            results[directory] = dict({"path": print_path, "success": status, "msg": msg_ret}, **report)
+    # Results keep the order of the request
+    output = [results[directory] for directory in dict(_directories)]
+    action = "created" if _state == "present" else "deleted"
+    failed = [result for result in output if not result['success']]
+    if len(failed) > 0:
+        status = False
+        msg_ret = f"<{len(failed)}> of <{len(output)}> Directories not <{action}> in share <{_share}>. See content"
+    else:
+        status = True
+        msg_ret = f"<{len(output)}> Directories <{action}> in share <{_share}>"
+
+    return status, msg_ret, output
+
+
 def main():
     module=AnsibleModule(
         argument_spec=dict(
             share = dict(required=True, type='str'),
             connection_string = dict(required=True, type='str'),
             path = dict(required=False, type='str', default=''),
+            paths = dict(required=False, type='list', elements='str', default=[]),
             parent_path = dict(required=False, type='str', default=''),
             state = dict(required=False, type='str', choices=["present", "absent"], default='present'),
+            recursive = dict(required=False, type='bool', default=False),
+            parents = dict(required=False, type='bool', default=False),
+            max_concurrency = dict(required=False, type='int', default=1),
         )
     )
 
     share = module.params.get("share")
     connection_string = module.params.get("connection_string")
     path = module.params.get("path")
+    paths = module.params.get("paths")
     parent_path = module.params.get("parent_path")
     state = module.params.get("state")
+    recursive = module.params.get("recursive")
+    parents = module.params.get("parents")
+    max_concurrency = module.params.get("max_concurrency")
     path_sub, print_path = right_path(path)
     parent_path_sub, print_path_parent = right_path(parent_path)
 
-    if not parent_path_sub:
+    if paths and path:
+        module.fail_json(failed=True, msg="Parameters path and paths are mutually exclusive")
+
+    report = {}
+    directory = parent_path_sub + "/" + path_sub if parent_path_sub else path_sub
+    print_directory = print_path_parent.rstrip("/") + print_path
+    if paths:
+        directories = []
+        for item in paths:
+            item_sub, print_item = right_path(item)
+            directories.append((parent_path_sub + "/" + item_sub if parent_path_sub else item_sub,
+                                print_path_parent.rstrip("/") + print_item))
+        success, msg_ret, output = manage_directories(connection_string, share, directories, state, parents, recursive,
+                                                      max_concurrency)
+    elif recursive and state == "absent":
+        success, msg_ret, output, report = delete_tree(connection_string, share, directory, print_directory, max_concurrency)
+    elif parents and state == "present":
+        success, msg_ret, output = create_directory_parents(connection_string, share, directory, print_directory)
+    elif not parent_path_sub:
         success, msg_ret, output = create_directory(connection_string, share, path_sub, state, print_path)
     else:
         success, msg_ret, output = create_subdirectory(connection_string, share, path_sub, parent_path_sub, state, print_path, print_path_parent)
 
     if success:
-        module.exit_json(failed=False, msg=msg_ret, content=output)
+        module.exit_json(failed=False, msg=msg_ret, content=output, **report)
     else:
-        module.fail_json(failed=True, msg=msg_ret, content=output)
+        module.fail_json(failed=True, msg=msg_ret, content=output, **report)
 
 
 if __name__ == "__main__":
@@ -33,8 +33,43 @@ options:
   share:
     description:
       Name of the share to be managed
-    required: true
+    required: false
     type: string
+  quota:
+    description:
+      - Size limit of the share in GiB when state is present, also applied to an existing share
+    required: false
+    type: int
+  shares:
+    description:
+      - List of shares managed in a single task, instead of share
+      - Shares are created or deleted in parallel, up to max_concurrency at a time, through one service client
+      - Content returns one result per share, with its name, success and msg
+    required: false
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description: Name of the share
+        required: true
+        type: string
+      quota:
+        description: Size limit of the share in GiB
+        required: false
+        type: int
+      state:
+        description: State of this share, state of the task when not present
+        required: false
+        type: string
+        choices:
+          - present
+          - absent
+  max_concurrency:
+    description:
+      - Maximum number of shares managed in parallel when shares is set
+    required: false
+    type: int
+    default: 1
   connection_string:
     description:
       String that include URL & Token to connect to Azure Storage Account. Provided by Azure Portal
@@ -80,27 +115,44 @@ tasks:
       share: share-to-test
       connection_string: "{{ connection_string }}"
     register: output
+
+  - name: Onboard a tenant, several shares at once
+    o4n_azure_manage_share:
+      account_name: "{{ account_name }}"
+      connection_string: "{{ connection_string }}"
+      shares:
+        - name: tenant1-data
+          quota: 100
+        - name: tenant1-logs
+          quota: 20
+        - name: tenant1-old
+          state: absent
+      max_concurrency: 8
+    register: output
 """
 
 
-from azure.storage.fileshare import ShareClient
 from ansible.module_utils.basic import AnsibleModule
 import azure.core.exceptions as aze
+from ..module_utils.util_thread_pool import run_in_pool
+from ..module_utils.util_clients import get_service_client, get_share_client
 
-def create_client_with_connection_string(_conn_string):
-        # Instantiate the ShareServiceClient from a connection string
-        from azure.storage.fileshare import ShareServiceClient
-        file_service = ShareServiceClient.from_connection_string(_conn_string)
+def create_client_with_connection_string(_conn_string, _pool_size=1):
+        # Shared ShareServiceClient of the connection string, used by every share of the task
+        return get_service_client(_conn_string, _pool_size)
 
-def manage_share(_share, _conn_string, _account_name, _state):
+def manage_share(_share, _conn_string, _account_name, _state, _quota=None, _service_client=None):
     output = {"share": _share}
     action = "none"
     try:
-        # Instantiate the ShareClient from a connection string
-        share = ShareClient.from_connection_string(_conn_string, share_name=_share)
+        # Instantiate the ShareClient from the shared service client
+        if _service_client:
+            share = _service_client.get_share_client(_share)
+        else:
+            share = get_share_client(_conn_string, _share)
         # Create or Delete the share
         if _state.lower() == "present":
-            share.create_share()
+            share.create_share(quota=_quota)
             action = "created"
         elif _state.lower() == "absent":
             share.delete_share()
@@ -110,6 +162,14 @@ def manage_share(_share, _conn_string, _account_name, _state):
     except aze.ResourceExistsError:
         msg_ret = f"File Share <{_share}> not created in account <{_account_name}>. Error: <The specified resource already exist>"
         status = True
+        # An existing share gets the requested quota
+        if _quota:
+            try:
+                share.set_share_quota(_quota)
+                msg_ret = f"File Share <{_share}> quota set to <{_quota}> GiB in account <{_account_name}>"
+            except Exception as error:
+                msg_ret = f"Error managing File Share <{_share}> in <{_account_name}>. Error: <{error}>"
+                status = False
     except aze.ResourceNotFoundError:
         msg_ret = f"File Share <{_share}> not deleted in account <{_account_name}>. Error: <The specified resource does not exist>"
         status = True
@@ -120,23 +180,63 @@ def manage_share(_share, _conn_string, _account_name, _state):
     return status, msg_ret, output
 
 
+def manage_shares(_shares, _conn_string, _account_name, _state, _max_concurrency=1):
+    # Every share is applied in parallel through one service client, state of a share defaults to _state
+    output = []
+    try:
+        service_client = create_client_with_connection_string(_conn_string, _max_concurrency)
+    except Exception as error:
+        msg_ret = f"Error managing File Shares in <{_account_name}>. Error: <{error}>"
+        return False, msg_ret, output
+    outcomes = run_in_pool(lambda share: manage_share(share['name'], _conn_string, _account_name, share.get('state') or _state,
+                                                      share.get('quota'), service_client),
+                           _shares, _max_concurrency)
+    # Results keep the order of the request
+    for status, msg_ret, result in outcomes:
+        output.append(dict(result, success=status, msg=msg_ret))
+    failed = [result for result in output if not result['success']]
+    if len(failed) > 0:
+        status = False
+        msg_ret = f"<{len(failed)}> of <{len(output)}> File Shares not managed in account <{_account_name}>. See content"
+    else:
+        status = True
+        msg_ret = f"<{len(output)}> File Shares managed in account <{_account_name}>"
+
+    return status, msg_ret, output
+
+
 def main():
     module=AnsibleModule(
         argument_spec=dict(
             account_name=dict(required=True, type='str'),
             state=dict(required=False, type='str', choices=["present", "absent"], default='present'),
-            share=dict(required=True, type='str'),
+            share=dict(required=False, type='str'),
+            quota=dict(required=False, type='int'),
+            shares=dict(required=False, type='list', elements='dict', options=dict(
+                name=dict(required=True, type='str'),
+                quota=dict(required=False, type='int'),
+                state=dict(required=False, type='str', choices=["present", "absent"]),
+            )),
+            max_concurrency=dict(required=False, type='int', default=1),
             connection_string=dict(required= True, type='str'),
-        )
+        ),
+        required_one_of=[["share", "shares"]],
+        mutually_exclusive=[["share", "shares"]],
     )
 
     state = module.params.get("state")
     share = module.params.get("share")
+    quota = module.params.get("quota")
+    shares = module.params.get("shares")
+    max_concurrency = module.params.get("max_concurrency")
     connection_string = module.params.get("connection_string")
     account_name = module.params.get("account_name")
 
-    create_client_with_connection_string(connection_string)
-    success, msg_ret, output = manage_share(share,connection_string,account_name,state)
+    if shares:
+        success, msg_ret, output = manage_shares(shares, connection_string, account_name, state, max_concurrency)
+    else:
+        success, msg_ret, output = manage_share(share, connection_string, account_name, state, quota,
+                                                create_client_with_connection_string(connection_string))
     if success:
         module.exit_json(failed=False, msg=msg_ret, content=output)
     else:
@@ -43,19 +43,47 @@ options:
     type: string
   files:
     description:
-      files to deleted from File ShRE
+      - files to deleted from File ShRE
+      - Glob pattern, supports several '*', '?', '[...]' and names with more than one dot
+      - '*.*' selects every file, with or without extension
+      - One pattern or a list of patterns, all of them are checked in a single pass over the listing
+      - A string is always a single pattern, commas included, use a list to give several patterns
     required: true
-    choices:
-      - 'file*'
-      - 'file*.txt'
-      - 'file*.tx*'
-      - 'file*.*'
-      - file.tx*
-      - '*.txt'
-      - 'file.*'
-      - '*.*'
-      - 'file.txt'
-    type: string
+    type: raw
+  exclude:
+    description:
+      - Patterns of files that must not be selected, even if they match files
+      - Same syntax as files, one pattern or a list of patterns
+    required: false
+    type: raw
+  range_size:
+    description:
+      - Size in bytes of every range sent when a file is uploaded in ranges
+      - Azure File Share accepts up to 4194304 bytes (4 MiB) per range
+    required: false
+    type: int
+    default: 4194304
+  max_connections:
+    description:
+      - Number of ranges of a single file uploaded in parallel
+      - Files bigger than range_size are created at their final size and uploaded in ranges when greater than 1
+    required: false
+    type: int
+    default: 1
+  recursive:
+    description:
+      - Upload the whole tree under source_path, creating every Sub Directory under dest_path
+      - The files pattern is applied to file names in every Directory of the tree
+      - Content lists the uploaded files relative to source_path
+    required: false
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Number of files uploaded, and directories created, in parallel when recursive is true
+    required: false
+    type: int
+    default: 1
 """
 
 RETURN = """
@@ -93,24 +121,40 @@ tasks:
       files: "*.py"
       dest_path: "/upload-test/test"
     register: output
+
+  - name: Upload a Directory tree
+    o4n_azure_upload_directory:
+      account_name: "{{ account_name }}"
+      share: "automation-filesharing"
+      connection_string: "{{ connection_string }}"
+      source_path: "./release"
+      files: "*.*"
+      dest_path: "/releases/v1"
+      recursive: true
+      max_concurrency: 16
+    register: output
 """
 
 import os
-from azure.storage.fileshare import ShareClient
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import azure.core.exceptions as aze
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.util_get_right_path import right_path
-from azure.storage.fileshare import ShareClient
 from ansible.module_utils.basic import AnsibleModule
-from ..module_utils.util_list_shares import list_shares_in_service
-from ..module_utils.util_select_files_pattern import select_files
+from ..module_utils.util_share_exists import share_exists
+from ..module_utils.util_select_files_pattern import select_files, pattern_list
 from ..module_utils.util_get_right_path import right_path
+from ..module_utils.util_upload_file import upload_local_file, upload_file, MAX_RANGE_SIZE
+from ..module_utils.util_thread_pool import run_in_pool
+from ..module_utils.util_sync_files import without_state_file
+from ..module_utils.util_listing_cache import invalidate_listing
+from ..module_utils.util_clients import get_share_client, get_directory_client
 
 def create_directory(_connection_string, _share, _directory, _print_path):
     status = True
-    share = ShareClient.from_connection_string(_connection_string, _share)
     try:
-        new_directory = share.get_directory_client(directory_path=_directory)
+        new_directory = get_directory_client(_connection_string, _share, _directory)
         action = "created"
         new_directory.create_directory()
         msg_ret = f"Directory <{_print_path}> created in share <{_share}>"
@@ -124,10 +168,9 @@ def create_directory(_connection_string, _share, _directory, _print_path):
     return status, msg_ret, _print_path
 
 def create_subdirectory(_connection_string, _share, _directory, _parent_directory, _print_path, _print_path_parent):
-    share = ShareClient.from_connection_string(_connection_string, _share)
     status = True
     try:
-        parent_dir = share.get_directory_client(directory_path=_parent_directory)
+        parent_dir = get_directory_client(_connection_string, _share, _parent_directory)
         action = "created"
         parent_dir.create_subdirectory(_directory)
         msg_ret = f"Sub Directory <{_print_path}> <{action}> under Directory <{_print_path_parent}> in share <{_share}>"
@@ -142,29 +185,29 @@ def create_subdirectory(_connection_string, _share, _directory, _parent_director
 
     return status, msg_ret, _print_path_parent + _print_path
 
-def upload_files(_account_name, _share, _connection_string, _source_path, _source_file, _dest_path):
+def upload_files(_account_name, _share, _connection_string, _source_path, _source_file, _dest_path,
+                 _range_size=MAX_RANGE_SIZE, _max_connections=1, _exclude=None):
   found_files = []
   _dest_path, print_path = right_path(_dest_path)
   try:
       # get files form local file system
       base_dir = os.getcwd() + "/" + _source_path + "/"
       search_dir = os.path.dirname(base_dir)
-      files_in_dir = os.listdir(search_dir)
-      # Instantiate the ShareClient from a connection string
-      status, msg_ret, shares_in_service = list_shares_in_service(_account_name, _connection_string)
-      if status:
-        share_exist = [share_name for share_name in shares_in_service if share_name == _share]
-      if len(share_exist) == 1:
-        share = ShareClient.from_connection_string(_connection_string, _share)
-        status, msg_ret, found_files = select_files(_source_file, files_in_dir)
+      files_in_dir = without_state_file(os.listdir(search_dir))
+      # Shared ShareClient of the connection string
+      status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+      if share_exist:
+        share = get_share_client(_connection_string, _share, _max_connections)
+        status, msg_ret, found_files = select_files(_source_file, files_in_dir, _exclude)
         source_path = _source_path + "/" if _source_path else ""
         dest_path = _dest_path + "/" if _dest_path else ""
         if len(found_files) > 0:
             for file_name in found_files:
                 file = share.get_file_client(dest_path + file_name)
                 # Upload files
-                with open(source_path + file_name, "rb") as source_file:
-                    file.upload_file(source_file)
+                upload_local_file(file, source_path + file_name, _range_size, _max_connections)
+            # Cached listings of the destination are no longer valid
+            invalidate_listing(_connection_string, _share, _dest_path)
             status = True
             msg_ret = f"Files uploaded to Directory <{print_path}> in share <{_share}>"
         else:
@@ -180,6 +223,85 @@ def upload_files(_account_name, _share, _connection_string, _source_path, _sourc
   return status, msg_ret, found_files
 
 
+def create_remote_directory(_share, _directory):
+    try:
+        _share.get_directory_client(directory_path=_directory).create_directory()
+        return None
+    except aze.ResourceExistsError:
+        return None
+    except Exception as error:
+        return str(error)
+
+def upload_tree(_account_name, _share, _connection_string, _source_path, _source_file, _dest_path,
+                _max_concurrency=1, _range_size=MAX_RANGE_SIZE, _max_connections=1, _exclude=None):
+    uploaded_files = []
+    report = {"failed_files": [], "failed_directories": []}
+    _dest_path, print_path = right_path(_dest_path)
+    try:
+        status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+        if not share_exist:
+            msg_ret = f"Files not uploaded to Directory <{print_path}>. Error: Share <{_share}> not found"
+            return False, msg_ret, uploaded_files, report
+        share = get_share_client(_connection_string, _share, _max_concurrency * _max_connections)
+        source_root = _source_path if _source_path else "."
+        dest_path = _dest_path + "/" if _dest_path else ""
+        pending = deque()
+        # Uploads in flight are bounded, the oldest ones are collected before more files are queued
+        max_pending = 4 * max(1, _max_concurrency)
+
+        def collect(rel_file, future):
+            error = future.result()
+            if error:
+                report["failed_files"].append({"name": rel_file, "error": error})
+            else:
+                uploaded_files.append(rel_file)
+
+        # Walk the local tree level by level, the root directory is already created.
+        # Files are queued for upload as soon as their directory is scanned
+        level = [""]
+        with ThreadPoolExecutor(max_workers=max(1, _max_concurrency)) as executor:
+            while level:
+                next_level = []
+                for rel_dir in level:
+                    with os.scandir(os.path.join(source_root, rel_dir)) as dir_entries:
+                        entries = sorted(dir_entries, key=lambda entry: entry.name)
+                    status, msg_ret, found_files = select_files(_source_file, without_state_file([entry.name for entry in entries if entry.is_file()]),
+                                                               _exclude)
+                    if not status:
+                        return status, msg_ret, uploaded_files, report
+                    if found_files:
+                        # Cached listings of the destination are no longer valid
+                        invalidate_listing(_connection_string, _share, (dest_path + rel_dir).rstrip("/"))
+                    for file_name in found_files:
+                        rel_file = rel_dir + file_name
+                        if len(pending) >= max_pending:
+                            collect(*pending.popleft())
+                        pending.append((rel_file, executor.submit(upload_file, share, os.path.join(source_root, rel_file),
+                                                                  dest_path + rel_file, _range_size, _max_connections)))
+                    next_level += [rel_dir + entry.name + "/" for entry in entries if entry.is_dir(follow_symlinks=False)]
+                # Create the directories of the next level in parallel, their parents already exist
+                errors = run_in_pool(lambda rel_dir: create_remote_directory(share, dest_path + rel_dir.rstrip("/")),
+                                     next_level, _max_concurrency)
+                report["failed_directories"] += [{"name": rel_dir.rstrip("/"), "error": error} for rel_dir, error in zip(next_level, errors) if error]
+                level = [rel_dir for rel_dir, error in zip(next_level, errors) if not error]
+            while pending:
+                collect(*pending.popleft())
+        if len(report["failed_files"]) > 0 or len(report["failed_directories"]) > 0:
+            status = False
+            msg_ret = f"Directory tree not fully uploaded to Directory <{print_path}> in share <{_share}>. See failed_files and failed_directories"
+        elif len(uploaded_files) == 0:
+            status = False
+            msg_ret = f"Files not uploaded to Directory <{print_path}> in share <{_share}>. No file to upload"
+        else:
+            status = True
+            msg_ret = f"Directory tree uploaded to Directory <{print_path}> in share <{_share}>"
+    except Exception as error:
+        msg_ret = f"Directory tree not uploaded to Directory <{print_path}> in share <{_share}>. Error: <{error}>"
+        status = False
+
+    return status, msg_ret, uploaded_files, report
+
+
 def main():
     module=AnsibleModule(
         argument_spec=dict(
@@ -187,8 +309,13 @@ def main():
             share = dict(required=True, type='str'),
             connection_string = dict(required=True, type='str'),
             source_path=dict(required=False, type='str', default=''),
-            files=dict(required=True, type='str'),
-            dest_path=dict(required=False, type='str', default='')
+            files=dict(required=True, type='raw'),
+            exclude=dict(required=False, type='raw', default=[]),
+            dest_path=dict(required=False, type='str', default=''),
+            range_size=dict(required=False, type='int', default=MAX_RANGE_SIZE),
+            max_connections=dict(required=False, type='int', default=1),
+            recursive=dict(required=False, type='bool', default=False),
+            max_concurrency=dict(required=False, type='int', default=1)
         )
     )
 
@@ -198,17 +325,30 @@ def main():
     dest_path = module.params.get("dest_path")
     path_sub, print_path = right_path(dest_path)
     source_path = module.params.get("source_path")
-    files = module.params.get("files")
+    files = pattern_list(module.params.get("files"))
+    exclude = pattern_list(module.params.get("exclude"))
+    range_size = module.params.get("range_size")
+    max_connections = module.params.get("max_connections")
+    recursive = module.params.get("recursive")
+    max_concurrency = module.params.get("max_concurrency")
+
+    if range_size < 1 or range_size > MAX_RANGE_SIZE:
+        module.fail_json(failed=True, msg=f"Invalid range_size <{range_size}>. Must be between 1 and <{MAX_RANGE_SIZE}> bytes")
 
     success = False
+    report = {}
     success, msg_ret, output = create_directory(connection_string, share, path_sub, print_path)
-    if success:
-        success, msg_ret, output = upload_files(account_name, share, connection_string, source_path, files, dest_path)
+    if success and recursive:
+        success, msg_ret, output, report = upload_tree(account_name, share, connection_string, source_path, files, dest_path,
+                                                       max_concurrency, range_size, max_connections, exclude)
+    elif success:
+        success, msg_ret, output = upload_files(account_name, share, connection_string, source_path, files, dest_path,
+                                                range_size, max_connections, exclude)
 
     if success:
-        module.exit_json(failed=False, msg=msg_ret, content=output)
+        module.exit_json(failed=False, msg=msg_ret, content=output, **report)
     else:
-        module.fail_json(failed=True, msg=msg_ret, content=output)
+        module.fail_json(failed=True, msg=msg_ret, content=output, **report)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -34,19 +34,19 @@ options:
     type: string
   files:
     description:
-      files to deleted from File ShRE
+      - files to deleted from File ShRE
+      - Glob pattern, supports several '*', '?', '[...]' and names with more than one dot
+      - '*.*' selects every file, with or without extension
+      - One pattern or a list of patterns, all of them are checked in a single pass over the listing
+      - A string is always a single pattern, commas included, use a list to give several patterns
     required: true
-    choices:
-      - 'file*'
-      - 'file*.txt'
-      - 'file*.tx*'
-      - 'file*.*'
-      - file.tx*
-      - '*.txt'
-      - 'file.*'
-      - '*.*'
-      - 'file.txt'
-    type: string
+    type: raw
+  exclude:
+    description:
+      - Patterns of files that must not be selected, even if they match files
+      - Same syntax as files, one pattern or a list of patterns
+    required: false
+    type: raw
   source_path:
     description:
       path, local directory where files to be uploaded are 
@@ -55,6 +55,62 @@ options:
      path where the files will be downloaded
     required: false
     type: string
+  max_concurrency:
+    description:
+      - Number of files uploaded in parallel
+      - Output list keeps the same order no matter the number of workers
+    required: false
+    type: int
+    default: 1
+  range_size:
+    description:
+      - Size in bytes of every range sent when a file is uploaded in ranges
+      - Azure File Share accepts up to 4194304 bytes (4 MiB) per range
+    required: false
+    type: int
+    default: 4194304
+  max_connections:
+    description:
+      - Number of ranges of a single file uploaded in parallel
+      - Files bigger than range_size are created at their final size and uploaded in ranges when greater than 1
+    required: false
+    type: int
+    default: 1
+  sync_mode:
+    description:
+      - Upload only new or changed files, dest_path is listed once and compared with the local files
+      - none, upload every matched file
+      - size, upload files missing in the share or with a different size
+      - timestamp, like size, and also files modified locally after their last change in the share
+      - Files not uploaded are returned in skipped_files
+    required: false
+    type: string
+    choices:
+      - none
+      - size
+      - timestamp
+    default: none
+  cache_ttl:
+    description:
+      - Seconds the listing of dest_path used by sync_mode is reused from the on-disk cache of the host,
+        0 disables the cache
+      - The cached listing of dest_path is dropped once files are uploaded
+    required: false
+    type: int
+    default: 0
+  engine:
+    description:
+      - thread, transfers run on a pool of max_concurrency threads
+      - async, transfers run on a single thread with asyncio and the aio clients of the SDK, with up to
+        max_concurrency requests in flight. Suited to many small files, range_size and max_connections are not used
+      - With async, local files are read and written from a helper thread, disk access never stalls the transfers in flight
+      - async requires azure-storage-file-share[aio] (aiohttp)
+    required: false
+    type: string
+    choices:
+      - thread
+      - async
+    default: thread
 """
 
 RETURN = """
@@ -77,8 +133,29 @@ output:
             "o4n_azure_list_directories.py"
         ],
         "failed": false,
-        "msg": "Files uploaded to Directory </dir1> in share <share-to-test2>"
+        "failed_files": [],
+        "msg": "Files uploaded to Directory </dir1> in share <share-to-test2>",
+        "skipped_files": []
     }
+failed_files:
+  description: List of files not uploaded, with the error returned for each one
+  type: list
+  returned: allways
+  sample:
+    "failed_files": [
+        {
+            "name": "o4n_azure_list_files.py",
+            "error": "The specified parent path does not exist."
+        }
+    ]
+skipped_files:
+  description: List of files not uploaded because they are unchanged in the share, when sync_mode is not none
+  type: list
+  returned: allways
+  sample:
+    "skipped_files": [
+        "o4n_azure_list_shares.py"
+    ]
 """
 
 EXAMPLES = """
@@ -118,42 +195,118 @@ tasks:
       connection_string: "{{ connection_string }}"
       files: file*.t*
       register: output
+
+  - name: Upload files using 8 workers
+    o4n_azure_upload_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /files
+      files: "*.cfg"
+      dest_path: /dir1/dir2
+      max_concurrency: 8
+    register: output
+
+  - name: Upload a large backup image using 8 connections
+    o4n_azure_upload_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /backups
+      files: "backup.img"
+      dest_path: /backups
+      max_connections: 8
+    register: output
+
+  - name: Upload only new or changed files
+    o4n_azure_upload_files:
+      account_name: "{{ connection_string }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /files
+      files: "*.log"
+      dest_path: /dir1/dir2
+      sync_mode: timestamp
+    register: output
+
+  - name: Upload thousands of small files from one thread
+    o4n_azure_upload_files:
+      account_name: "{{ account_name }}"
+      share: share-to-test
+      connection_string: "{{ connection_string }}"
+      source_path: /files
+      files: "*.json"
+      dest_path: /events
+      engine: async
+      max_concurrency: 1000
+    register: output
 """
 
 
 import os
-from azure.storage.fileshare import ShareClient
-from ansible.module_utils.basic import AnsibleModule
-from ..module_utils.util_list_shares import list_shares_in_service
-from ..module_utils.util_select_files_pattern import select_files
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ..module_utils.util_share_exists import share_exists
+from ..module_utils.util_select_files_pattern import select_files, pattern_list, literal_prefix
 from ..module_utils.util_get_right_path import right_path
+from ..module_utils.util_thread_pool import run_in_pool
+from ..module_utils.util_upload_file import upload_file, MAX_RANGE_SIZE
+from ..module_utils.util_list_files import list_files_in_share
+from ..module_utils.util_sync_files import upload_needed, without_state_file, SYNC_MODES
+from ..module_utils.util_listing_cache import invalidate_listing
+from ..module_utils.util_clients import get_share_client
+from ..module_utils.util_async_engine import async_upload_files, HAS_AIO, AIO_IMPORT_ERROR, AIO_REQUIREMENT, ENGINES
 
 
-def upload_files(_account_name, _share, _connection_string, _source_path, _source_file, _dest_path):
+def upload_files(_account_name, _share, _connection_string, _source_path, _source_file, _dest_path, _max_concurrency=1,
+                 _range_size=MAX_RANGE_SIZE, _max_connections=1, _sync_mode="none",
+                 _exclude=None, _cache_ttl=0, _engine="thread"):
   found_files = []
+  report = {"failed_files": [], "skipped_files": []}
   _dest_path, print_path = right_path(_dest_path)
   try:
       # get files form local file system
       base_dir = os.getcwd() + "/" + _source_path + "/"
       search_dir = os.path.dirname(base_dir)
-      files_in_dir = os.listdir(search_dir)
+      files_in_dir = without_state_file(sorted(os.listdir(search_dir)))
       # Instantiate the ShareClient from a connection string
-      status, msg_ret, shares_in_service = list_shares_in_service(_account_name, _connection_string)
-      if status:
-        share_exist = [share_name for share_name in shares_in_service if share_name == _share]
-      if len(share_exist) == 1:
-        share = ShareClient.from_connection_string(_connection_string, _share)
-        status, msg_ret, found_files = select_files(_source_file, files_in_dir)
+      status, msg_ret, share_exist = share_exists(_account_name, _connection_string, _share)
+      if share_exist:
+        share = get_share_client(_connection_string, _share, _max_concurrency * _max_connections)
+        status, msg_ret, found_files = select_files(_source_file, files_in_dir, _exclude)
         source_path = _source_path + "/" if _source_path else ""
         dest_path = _dest_path + "/" if _dest_path else ""
+        if _sync_mode != "none" and len(found_files) > 0:
+            # One listing of the destination, files unchanged on the share are skipped
+            status_list, msg_list, files_in_share = list_files_in_share(_account_name, _connection_string, _share, _dest_path,
+                                                                        print_path, ["timestamps"], literal_prefix(_source_file),
+                                                                        _cache_ttl)
+            remote_files = {file['name']: file for file in files_in_share} if status_list else {}
+            changed = [upload_needed(source_path + file_name, remote_files.get(file_name), _sync_mode) for file_name in found_files]
+            report["skipped_files"] = [file_name for file_name, upload in zip(found_files, changed) if not upload]
+            found_files = [file_name for file_name, upload in zip(found_files, changed) if upload]
         if len(found_files) > 0:
-            for file_name in found_files:
-                file = share.get_file_client(dest_path + file_name)
-                # Upload files
-                with open(source_path + file_name, "rb") as source_file:
-                    file.upload_file(source_file)
+            # Upload files, results keep the order of found_files
+            if _engine == "async":
+                errors = async_upload_files(_connection_string, _share,
+                                            [(source_path + file_name, dest_path + file_name) for file_name in found_files],
+                                            _max_concurrency)
+            else:
+                errors = run_in_pool(lambda file_name: upload_file(share, source_path + file_name, dest_path + file_name,
+                                                                   _range_size, _max_connections),
+                                     found_files, _max_concurrency)
+            # Cached listings of the destination are no longer valid
+            invalidate_listing(_connection_string, _share, _dest_path)
+            report["failed_files"] = [{"name": file_name, "error": error} for file_name, error in zip(found_files, errors) if error]
+            found_files = [file_name for file_name, error in zip(found_files, errors) if not error]
+            if len(report["failed_files"]) == 0:
+                status = True
+                msg_ret = f"Files uploaded to Directory <{print_path}> in share <{_share}>"
+            else:
+                status = False
+                msg_ret = f"<{len(report['failed_files'])}> Files not uploaded to Directory <{print_path}> in share <{_share}>. See failed_files"
+        elif len(report["skipped_files"]) > 0:
             status = True
-            msg_ret = f"Files uploaded to Directory <{print_path}> in share <{_share}>"
+            msg_ret = f"Files not uploaded to Directory <{print_path}> in share <{_share}>. All files are up to date"
         else:
             status = False
             msg_ret = f"Files not uploaded to Directory <{print_path}> in share <{_share}>. No file to upload"
@@ -164,7 +317,7 @@ def upload_files(_account_name, _share, _connection_string, _source_path, _sourc
       msg_ret = f"File not uploaded to Directory <{print_path}> in share <{_share}>. Error: <{error}>"
       status = False
 
-  return status, msg_ret, found_files
+  return status, msg_ret, found_files, report
 
 
 def main():
@@ -174,8 +327,15 @@ def main():
           share=dict(required=True, type='str'),
           connection_string=dict(required=True, type='str'),
           source_path=dict(required=False, type='str', default=''),
-          files=dict(required=True, type='str'),
-          dest_path=dict(required=False, type='str', default='')
+          files=dict(required=True, type='raw'),
+          exclude=dict(required=False, type='raw', default=[]),
+          dest_path=dict(required=False, type='str', default=''),
+          max_concurrency=dict(required=False, type='int', default=1),
+          range_size=dict(required=False, type='int', default=MAX_RANGE_SIZE),
+          max_connections=dict(required=False, type='int', default=1),
+          sync_mode=dict(required=False, type='str', choices=SYNC_MODES, default='none'),
+          cache_ttl=dict(required=False, type='int', default=0),
+          engine=dict(required=False, type='str', choices=ENGINES, default='thread')
       )
   )
 
@@ -183,17 +343,29 @@ def main():
   share = module.params.get("share")
   connection_string = module.params.get("connection_string")
   source_path = module.params.get("source_path")
-  files = module.params.get("files")
+  files = pattern_list(module.params.get("files"))
+  exclude = pattern_list(module.params.get("exclude"))
   dest_path = module.params.get("dest_path")
+  max_concurrency = module.params.get("max_concurrency")
+  range_size = module.params.get("range_size")
+  max_connections = module.params.get("max_connections")
+  sync_mode = module.params.get("sync_mode")
+  cache_ttl = module.params.get("cache_ttl")
+  engine = module.params.get("engine")
+
+  if range_size < 1 or range_size > MAX_RANGE_SIZE:
+      module.fail_json(failed=True, msg=f"Invalid range_size <{range_size}>. Must be between 1 and <{MAX_RANGE_SIZE}> bytes")
+  if engine == "async" and not HAS_AIO:
+      module.fail_json(failed=True, msg=missing_required_lib(AIO_REQUIREMENT), exception=AIO_IMPORT_ERROR)
 
-  success, msg_ret, output = upload_files(account_name, share, connection_string, source_path, files, dest_path)
+  success, msg_ret, output, report = upload_files(account_name, share, connection_string, source_path, files, dest_path,
+                                                  max_concurrency, range_size, max_connections, sync_mode,
+                                                  exclude, cache_ttl, engine)
 
   if success:
-      module.exit_json(failed=False, msg=msg_ret, content=output)
+      module.exit_json(failed=False, msg=msg_ret, content=output, **report)
   else:
-      module.fail_json(failed=True, msg=msg_ret, content=output)
+      module.fail_json(failed=True, msg=msg_ret, content=output, **report)
 
 if __name__ == "__main__":
     main() 
-
-    
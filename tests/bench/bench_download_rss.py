@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# Peak RSS of o4n_azure_download_files against the size of the downloaded file.
+# A fake downloader streams the file chunk by chunk through util_download_file.download_to_local_file,
+# the call used by the module. Every size runs in its own process so ru_maxrss only covers that download.
+# The readall mode writes the file the way the module did before streaming, for comparison.
+#
+#   python tests/bench/bench_download_rss.py --sizes 64 256 1024 --buffer-size 4
+
+import argparse
+import importlib.util
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+MODULE_UTILS = os.path.join(os.path.dirname(__file__), "..", "..", "plugins", "module_utils")
+MIB = 1024 * 1024
+
+
+def load_module_util(_name):
+    # module_utils are loaded from their file, the benchmark needs neither ansible nor the Azure SDK
+    spec = importlib.util.spec_from_file_location(_name, os.path.join(MODULE_UTILS, _name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeDownloader:
+    # Same chunks() and readall() as StorageStreamDownloader, every chunk is a new buffer like a network read
+    def __init__(self, _size, _chunk_size):
+        self.size = _size
+        self.chunk_size = _chunk_size
+
+    def chunks(self):
+        for offset in range(0, self.size, self.chunk_size):
+            yield bytes(min(self.chunk_size, self.size - offset))
+
+    def readall(self):
+        return b"".join(self.chunks())
+
+
+class FakeFileClient:
+    def __init__(self, _size, _chunk_size):
+        self.size = _size
+        self.chunk_size = _chunk_size
+
+    def download_file(self, offset=None, length=None):
+        return FakeDownloader(self.size if length is None else length, self.chunk_size)
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_one(_mode, _size, _buffer_size):
+    util_download_file = load_module_util("util_download_file")
+    file_client = FakeFileClient(_size, _buffer_size)
+    baseline = peak_rss_mib()
+    with tempfile.TemporaryDirectory() as local_dir:
+        local_file = os.path.join(local_dir, "file.bin")
+        if _mode == "stream":
+            util_download_file.download_to_local_file(file_client, local_file, _size)
+        else:
+            with open(local_file, "wb") as data:
+                data.write(file_client.download_file().readall())
+        if os.path.getsize(local_file) != _size:
+            raise SystemExit(f"Downloaded <{os.path.getsize(local_file)}> bytes instead of <{_size}>")
+    print(f"{baseline:.1f} {peak_rss_mib():.1f}")
+
+
+def measure(_mode, _size, _buffer_size):
+    output = subprocess.run([sys.executable, __file__, "--child", _mode, str(_size), str(_buffer_size)],
+                            check=True, capture_output=True, text=True).stdout.split()
+    return float(output[0]), float(output[1])
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        run_one(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+    parser = argparse.ArgumentParser(description="Peak RSS of a download against the file size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024], help="file sizes in MiB")
+    parser.add_argument("--buffer-size", type=int, default=4, help="chunk size in MiB, the buffer_size option")
+    parser.add_argument("--readall-max", type=int, default=256, help="largest size in MiB measured in readall mode")
+    args = parser.parse_args()
+    # Streaming holds at most a couple of chunks, whatever the file size
+    limit = 4 * args.buffer_size
+
+    print(f"chunk size {args.buffer_size} MiB")
+    print(f"{'size MiB':>9} {'mode':>8} {'baseline MiB':>13} {'peak RSS MiB':>13} {'growth MiB':>11}")
+    for size in args.sizes:
+        for mode in ["stream", "readall"]:
+            if mode == "readall" and size > args.readall_max:
+                continue
+            baseline, peak = measure(mode, size * MIB, args.buffer_size * MIB)
+            print(f"{size:>9} {mode:>8} {baseline:>13.1f} {peak:>13.1f} {peak - baseline:>11.1f}")
+            if mode == "stream" and peak - baseline > limit:
+                raise SystemExit(f"Peak RSS grew by <{peak - baseline:.1f}> MiB for <{size}> MiB, more than <{limit}> MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# Time of select_files over synthetic names, compiled matcher against the implementation it replaced.
+# legacy_select_files is the previous select_files, kept verbatim for the comparison.
+# Match counts may differ where the old code mishandled names with more than one dot.
+#
+#   python tests/bench/bench_select_files.py --names 1000000
+
+import argparse
+import importlib.util
+import os
+import random
+import re
+import time
+
+MODULE_UTILS = os.path.join(os.path.dirname(__file__), "..", "..", "plugins", "module_utils")
+PATTERNS = ["*.txt", "file*", "file*.txt", "file.*", "file*.t*", "file.txt", "*.*"]
+EXTENSIONS = ["txt", "log", "cfg", "tar.gz", "bak"]
+PREFIXES = ["file", "backup", "report", "tmp"]
+
+
+def load_module_util(_name):
+    # module_utils are loaded from their file, the benchmark needs neither ansible nor the Azure SDK
+    spec = importlib.util.spec_from_file_location(_name, os.path.join(MODULE_UTILS, _name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_select_files(_file_pattern, _files_in_dir):
+    msg_ret = f"Files selection done for <{_file_pattern}>"
+    status = True
+    name_and_exension_pattern = re.split(r"\.", _file_pattern)
+    pattern_file_ext = name_and_exension_pattern[1] if len(name_and_exension_pattern) == 2 else []
+    pattern_file_name = name_and_exension_pattern[0]
+    try:
+        if _file_pattern == "*.*":  # *.*
+            return status, msg_ret, _files_in_dir
+        elif len(name_and_exension_pattern) == 1:  # file*
+            file_name_pattern = re.split(r"\*", pattern_file_name)[0]
+            return status, msg_ret, [file for file in _files_in_dir if re.split(r"\.", file)[0].startswith(file_name_pattern)]
+        elif len(name_and_exension_pattern) == 2:
+            if pattern_file_name.startswith("*") and not "*" in pattern_file_ext:  # *.txt
+                return status, msg_ret, [file for file in _files_in_dir if len(re.split(r"\.", file)) == 2 and
+                                            pattern_file_ext == re.split(r"\.", file)[1]]
+            elif pattern_file_ext.startswith("*") and not "*" in pattern_file_name:  # file.*
+                return status, msg_ret, [file for file in _files_in_dir if pattern_file_name == re.split(r"\.", file)[0]]
+            elif "*" in pattern_file_name and not "*" in pattern_file_ext:  # file*.txt
+                name_pattern = re.split(r"\*", pattern_file_name)[0]
+                return status, msg_ret, [file for file in _files_in_dir if
+                                            len(re.split(r"\.", file)) == 2 and file.startswith(name_pattern) and
+                                            pattern_file_ext == re.split(r"\.", file)[1]]
+            elif not "*" in pattern_file_name and "*" in pattern_file_ext:  # file.t*
+                file_ext_pattern = re.split(r"\*", pattern_file_ext)[0]
+                return status, msg_ret, [file for file in _files_in_dir if pattern_file_name == re.split(r"\.", file)[0]
+                                            and len(re.split(r"\.", file)) == 2 and
+                                            file_ext_pattern in re.split(r"\.", file)[1]]
+            elif "*" in pattern_file_name and "*" in pattern_file_ext:  # file*.t*
+                file_name_pattern = re.split(r"\*", pattern_file_name)[0]
+                file_ext_pattern = re.split(r"\*", pattern_file_ext)[0]
+                return status, msg_ret, [file for file in _files_in_dir if re.split(r"\.", file)[0].startswith(file_name_pattern)
+                                            and re.split(r"\.", file)[1].startswith(file_ext_pattern)]
+            elif "*" in pattern_file_name and pattern_file_ext == "*":  # file*.*
+                file_name_pattern = re.split(r"\*", pattern_file_name)[0]
+                return status, msg_ret, [file for file in _files_in_dir if
+                                            re.split(r"\.", file)[0].startswith(file_name_pattern)
+                                            and re.split(r"\.", file)[1] == "*"]
+            elif not "*" in pattern_file_name and not "*" in pattern_file_ext:  # file.txt
+                return status, msg_ret, [file for file in _files_in_dir if pattern_file_name == re.split(r"\.", file)[0]
+                                            and len(re.split(r"\.", file)) == 2 and
+                                            pattern_file_ext == re.split(r"\.", file)[1]]
+            else:
+                return False, f"Invalid file name: <{_file_pattern}>", []
+        else:
+            return False, f"Invalid file name: <{_file_pattern}>", []
+    except Exception as error:
+        return False, f"Files selection failed for <{_file_pattern}> pattern, error: <{error.args}>", []
+
+
+def synthetic_names(_count):
+    generator = random.Random(0)
+    return [f"{generator.choice(PREFIXES)}_{index}.{generator.choice(EXTENSIONS)}" for index in range(_count)] + ["file.txt"]
+
+
+def timed(_select, _pattern, _names):
+    start = time.perf_counter()
+    status, msg_ret, selected = _select(_pattern, _names)
+    return time.perf_counter() - start, len(selected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="select_files time against the previous implementation")
+    parser.add_argument("--names", type=int, default=1000000, help="number of synthetic file names")
+    args = parser.parse_args()
+
+    util_select_files_pattern = load_module_util("util_select_files_pattern")
+    names = synthetic_names(args.names)
+    print(f"{len(names)} names")
+    print(f"{'pattern':>10} {'legacy s':>9} {'matches':>8} {'compiled s':>11} {'matches':>8} {'speedup':>8}")
+    for pattern in PATTERNS:
+        legacy_time, legacy_count = timed(legacy_select_files, pattern, names)
+        compiled_time, compiled_count = timed(util_select_files_pattern.select_files, pattern, names)
+        print(f"{pattern:>10} {legacy_time:>9.2f} {legacy_count:>8} {compiled_time:>11.2f} {compiled_count:>8} "
+              f"{legacy_time / max(compiled_time, 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# Throughput of o4n_azure_upload_files as max_concurrency grows.
+# Files are uploaded through util_upload_file.upload_file and util_thread_pool.run_in_pool, the same calls
+# used by the module, to a local HTTP endpoint that answers every PUT after a simulated round trip.
+#
+#   python tests/bench/bench_upload_concurrency.py --files 500 --latency 20 --workers 1 4 16 64
+
+import argparse
+import http.client
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODULE_UTILS = os.path.join(os.path.dirname(__file__), "..", "..", "plugins", "module_utils")
+
+
+def load_module_util(_name):
+    # module_utils are loaded from their file, the benchmark needs neither ansible nor the Azure SDK
+    spec = importlib.util.spec_from_file_location(_name, os.path.join(MODULE_UTILS, _name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeShareHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeShareServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 would refuse the connections of large pools
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class FakeFileClient:
+    # Same upload_file call as ShareFileClient, one keep-alive connection per worker thread
+    def __init__(self, _share, _path):
+        self.share = _share
+        self.path = _path
+
+    def upload_file(self, _data):
+        body = _data.read()
+        connection = self.share.connection()
+        connection.request("PUT", "/" + self.path, body=body, headers={"Content-Length": str(len(body))})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 201:
+            raise Exception(f"Upload failed with status <{response.status}>")
+
+
+class FakeShareClient:
+    def __init__(self, _port):
+        self.port = _port
+        self.local = threading.local()
+
+    def connection(self):
+        if not hasattr(self.local, "connection"):
+            self.local.connection = http.client.HTTPConnection("127.0.0.1", self.port)
+        return self.local.connection
+
+    def get_file_client(self, _path):
+        return FakeFileClient(self, _path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload throughput against max_concurrency")
+    parser.add_argument("--files", type=int, default=500, help="number of files uploaded per run")
+    parser.add_argument("--size", type=int, default=4096, help="size of every file in bytes")
+    parser.add_argument("--latency", type=float, default=20, help="simulated round trip of the endpoint in ms")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    util_upload_file = load_module_util("util_upload_file")
+    util_thread_pool = load_module_util("util_thread_pool")
+
+    FakeShareHandler.latency = args.latency / 1000
+    server = FakeShareServer(("127.0.0.1", 0), FakeShareHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        files = []
+        for index in range(args.files):
+            files.append(f"file_{index}.cfg")
+            with open(os.path.join(source_dir, files[-1]), "wb") as source_file:
+                source_file.write(os.urandom(args.size))
+
+        print(f"{args.files} files of {args.size} bytes, {args.latency} ms per request")
+        print(f"{'workers':>8} {'seconds':>9} {'files/s':>9} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            share = FakeShareClient(server.server_address[1])
+            start = time.perf_counter()
+            errors = util_thread_pool.run_in_pool(
+                lambda file_name: util_upload_file.upload_file(share, os.path.join(source_dir, file_name), "dir1/" + file_name),
+                files, workers)
+            elapsed = time.perf_counter() - start
+            failed = [error for error in errors if error]
+            if failed:
+                raise SystemExit(f"<{len(failed)}> uploads failed, first error: <{failed[0]}>")
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.files / elapsed:>9.0f} {baseline / elapsed:>7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+
+pytest.importorskip("azure.storage.fileshare")
+pytest.importorskip("aiohttp")
+
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils import util_async_engine, util_walk_share
+
+# Directory tree of the fake share: directory -> (sub directories, files)
+TREE = {
+    "base": (["logs", "archive"], ["log_1.txt", "readme.md"]),
+    "base/logs": (["old"], ["log_2.txt", "data.csv"]),
+    "base/logs/old": ([], ["log_3.txt"]),
+    "base/archive": ([], ["log_4.txt"]),
+}
+
+
+def listing(_directory, _name_starts_with=None):
+    # Like the service, the name prefix filters directories and files
+    directories, files = TREE[_directory]
+    entries = [{"name": name, "file_id": name, "is_directory": True} for name in directories]
+    entries += [{"name": name, "size": 1, "file_id": name, "is_directory": False} for name in files]
+    return [entry for entry in entries if entry['name'].startswith(_name_starts_with or "")]
+
+
+class FakeShareClient:
+    def list_directories_and_files(self, directory_name=None, name_starts_with=None, include=None):
+        return listing(directory_name, name_starts_with)
+
+
+class FakeAsyncEntries:
+    def __init__(self, _entries):
+        self.entries = list(_entries)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.entries:
+            raise StopAsyncIteration
+        return self.entries.pop(0)
+
+
+class FakeAsyncShareClient:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def list_directories_and_files(self, directory_name=None, name_starts_with=None, include=None):
+        return FakeAsyncEntries(listing(directory_name, name_starts_with))
+
+
+@pytest.fixture
+def fake_share(monkeypatch):
+    share_found = lambda _account_name, _connection_string, _share: (True, "", True)
+    monkeypatch.setattr(util_walk_share, "share_exists", share_found)
+    monkeypatch.setattr(util_walk_share, "get_share_client", lambda *args, **kwargs: FakeShareClient())
+    monkeypatch.setattr(util_async_engine, "share_exists", share_found)
+    monkeypatch.setattr(util_async_engine, "async_share_client", lambda *args, **kwargs: FakeAsyncShareClient())
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_recursive_async_listing_matches_thread_listing(fake_share, max_concurrency):
+    status, msg_ret, thread_files = util_walk_share.list_files_in_tree("account", "cs", "share", "base", "/base",
+                                                                       max_concurrency)
+    assert status
+    # The prefix of a pattern such as 'log_*' must not stop the walk at directories named otherwise
+    status, msg_ret, async_files = util_async_engine.list_files_async("account", "cs", "share", "base", "/base",
+                                                                      max_concurrency, None, True, "log_")
+    assert status
+    assert async_files == thread_files
+    assert [file['path'] for file in async_files] == ["archive/log_4.txt", "log_1.txt", "logs/data.csv",
+                                                     "logs/log_2.txt", "logs/old/log_3.txt", "readme.md"]
+
+
+def test_single_directory_async_listing_uses_prefix(fake_share):
+    status, msg_ret, async_files = util_async_engine.list_files_async("account", "cs", "share", "base", "/base", 1, None,
+                                                                      False, "log_")
+    assert status
+    assert [file['name'] for file in async_files] == ["log_1.txt"]
+
+
+class FakeAsyncStream:
+    def __init__(self, _data, _fail_after=None):
+        self.data = _data
+        self.fail_after = _fail_after
+
+    async def chunks(self):
+        for offset in range(0, len(self.data), 2):
+            if self.fail_after is not None and offset >= self.fail_after:
+                raise Exception("connection reset")
+            yield self.data[offset:offset + 2]
+
+
+class FakeAsyncFileClient:
+    # Keeps the remote content, fails the range or the stream at fail_offset
+    def __init__(self, _data=None, _fail_offset=None):
+        self.data = _data
+        self.fail_offset = _fail_offset
+
+    async def create_file(self, size):
+        self.data = bytearray(size)
+
+    async def upload_range(self, data, offset, length):
+        if offset == self.fail_offset:
+            raise Exception("connection reset")
+        self.data[offset:offset + length] = data
+
+    async def delete_file(self):
+        self.data = None
+
+    async def download_file(self):
+        return FakeAsyncStream(bytes(self.data), self.fail_offset)
+
+
+def test_failed_async_upload_removes_the_partial_remote_file(tmp_path):
+    source_file = tmp_path / "file.bin"
+    source_file.write_bytes(b"ABCDEFGHIJ")
+    file_client = FakeAsyncFileClient()
+    asyncio.run(util_async_engine.upload_from_local_file(file_client, str(source_file), 2))
+    assert bytes(file_client.data) == b"ABCDEFGHIJ"
+    file_client = FakeAsyncFileClient(_fail_offset=6)
+    with pytest.raises(Exception):
+        asyncio.run(util_async_engine.upload_from_local_file(file_client, str(source_file), 2))
+    assert file_client.data is None
+
+
+def test_failed_async_download_keeps_the_previous_copy(tmp_path):
+    local_file = tmp_path / "file.bin"
+    asyncio.run(util_async_engine.download_to_local_file(FakeAsyncFileClient(b"ABCDEFGHIJ"), str(local_file)))
+    assert local_file.read_bytes() == b"ABCDEFGHIJ"
+    with pytest.raises(Exception):
+        asyncio.run(util_async_engine.download_to_local_file(FakeAsyncFileClient(b"KLMNOPQRST", 6), str(local_file)))
+    assert local_file.read_bytes() == b"ABCDEFGHIJ"
+    assert [path.name for path in tmp_path.iterdir()] == ["file.bin"]
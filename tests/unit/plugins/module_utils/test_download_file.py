@@ -0,0 +1,55 @@
+import pytest
+
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_download_file import download_to_local_file
+
+CONTENT = b"ABCDEFGHIJ"
+
+
+class FakeStream:
+    def __init__(self, _data, _fail_after=None):
+        self.data = _data
+        self.fail_after = _fail_after
+
+    def chunks(self):
+        for offset in range(0, len(self.data), 2):
+            if self.fail_after is not None and offset >= self.fail_after:
+                raise Exception("connection reset")
+            yield self.data[offset:offset + 2]
+
+
+class FakeFileClient:
+    # Fails the range starting at fail_offset, or the stream after fail_offset bytes
+    def __init__(self, _fail_offset=None):
+        self.fail_offset = _fail_offset
+
+    def download_file(self, offset=None, length=None):
+        if offset is None:
+            return FakeStream(CONTENT, self.fail_offset)
+        if offset == self.fail_offset:
+            raise Exception("connection reset")
+        return FakeStream(CONTENT[offset:offset + length])
+
+
+@pytest.mark.parametrize("max_connections", [1, 4])
+def test_download_writes_the_whole_file(tmp_path, max_connections):
+    local_file = tmp_path / "file.bin"
+    download_to_local_file(FakeFileClient(), str(local_file), len(CONTENT), 2, max_connections)
+    assert local_file.read_bytes() == CONTENT
+    assert [path.name for path in tmp_path.iterdir()] == ["file.bin"]
+
+
+@pytest.mark.parametrize("max_connections", [1, 4])
+def test_failed_download_keeps_the_previous_copy(tmp_path, max_connections):
+    local_file = tmp_path / "file.bin"
+    local_file.write_bytes(b"previous")
+    with pytest.raises(Exception):
+        download_to_local_file(FakeFileClient(6), str(local_file), len(CONTENT), 2, max_connections)
+    assert local_file.read_bytes() == b"previous"
+    assert [path.name for path in tmp_path.iterdir()] == ["file.bin"]
+
+
+def test_failed_download_leaves_no_file(tmp_path):
+    local_file = tmp_path / "file.bin"
+    with pytest.raises(Exception):
+        download_to_local_file(FakeFileClient(6), str(local_file), len(CONTENT), 2, 4)
+    assert list(tmp_path.iterdir()) == []
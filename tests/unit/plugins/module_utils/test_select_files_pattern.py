@@ -0,0 +1,94 @@
+from fnmatch import fnmatchcase
+
+import pytest
+
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_select_files_pattern import select_files, \
+    compile_patterns, literal_prefix, pattern_list
+
+NAMES = ["file.txt", "file1.txt", "file.tx", "file.txt.bak", "file", "fileA.log", "filex.log", "archive.tar.gz",
+         "backup.tar.gz", "data.gz", "readme", "report.csv", "a.b.c", "file,.txt", "filea.txt", "fileb.txt", ".hidden"]
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("file.txt", ["file.txt"]),
+    ("file*", ["file.txt", "file1.txt", "file.tx", "file.txt.bak", "file", "fileA.log", "filex.log", "file,.txt",
+               "filea.txt", "fileb.txt"]),
+    ("*.gz", ["archive.tar.gz", "backup.tar.gz", "data.gz"]),
+    ("*.tar.gz", ["archive.tar.gz", "backup.tar.gz"]),
+    ("file*.txt", ["file.txt", "file1.txt", "file,.txt", "filea.txt", "fileb.txt"]),
+    ("file.tx*", ["file.txt", "file.tx", "file.txt.bak"]),
+    ("file?.log", ["fileA.log", "filex.log"]),
+    ("file[a,b].txt", ["file,.txt", "filea.txt", "fileb.txt"]),
+    ("*.*.*", ["file.txt.bak", "archive.tar.gz", "backup.tar.gz", "a.b.c"]),
+])
+def test_select_files_single_pattern(pattern, expected):
+    status, msg_ret, selected = select_files(pattern, NAMES)
+    assert status
+    assert selected == expected
+
+
+@pytest.mark.parametrize("pattern", ["*", "*.*"])
+def test_select_files_match_all_selects_names_without_extension(pattern):
+    status, msg_ret, selected = select_files(pattern, NAMES)
+    assert selected == NAMES
+
+
+def test_select_files_exclude():
+    status, msg_ret, selected = select_files(["file*", "*.gz"], NAMES, ["*.log", "backup*", "file.txt.bak"])
+    assert status
+    assert selected == ["file.txt", "file1.txt", "file.tx", "file", "archive.tar.gz", "data.gz", "file,.txt", "filea.txt",
+                        "fileb.txt"]
+
+
+def test_select_files_keeps_listing_order():
+    status, msg_ret, selected = select_files(["report*", "archive*"], NAMES)
+    assert selected == ["archive.tar.gz", "report.csv"]
+
+
+def test_select_files_invalid_pattern():
+    status, msg_ret, selected = select_files(123, NAMES)
+    assert not status
+    assert selected == []
+
+
+@pytest.mark.parametrize("patterns", [
+    # literal names, suffixes, prefixes and regex patterns mixed in one set
+    ("file.txt", "readme", "*.gz", "*.csv", "file*", "rep*", "file?.log", "[ab]*.tar.*"),
+    # several suffixes sharing the last extension
+    ("*.gz", "*.tar.gz", "*ta.gz"),
+    # prefixes of different lengths
+    ("f*", "fil*", "arch*", "a*"),
+    # patterns only handled by the regex group
+    ("*.*.*", "file?.*", "file[!ab].txt", "*a*"),
+    ("*t",),
+])
+def test_compile_patterns_matches_fnmatch(patterns):
+    match = compile_patterns(patterns)
+    assert [name for name in NAMES if match(name)] == \
+        [name for name in NAMES if any(fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def test_compile_patterns_match_all_in_a_set():
+    match = compile_patterns(("*.log", "*.*"))
+    assert all(match(name) for name in NAMES)
+
+
+@pytest.mark.parametrize("patterns, expected", [
+    (None, ""),
+    ("file.txt", "file.txt"),
+    ("file*.txt", "file"),
+    ("file?.log", "file"),
+    ("log_[ab].txt", "log_"),
+    (["log_a*", "log_b?.txt", "log_c.txt"], "log_"),
+    (["file*", "data*"], ""),
+    (["file*", "*.*"], ""),
+    ("*.txt", ""),
+])
+def test_literal_prefix(patterns, expected):
+    assert literal_prefix(patterns) == expected
+
+
+def test_pattern_list():
+    assert pattern_list("file[a,b].txt") == ["file[a,b].txt"]
+    assert pattern_list(["*.txt", "*.log"]) == ["*.txt", "*.log"]
+    assert pattern_list(None) == []
@@ -0,0 +1,59 @@
+import pytest
+
+from ansible_collections.octupus.o4n_azure_fileshare.plugins.module_utils.util_upload_file import upload_local_file
+
+CONTENT = b"ABCDEFGHIJ"
+
+
+class FakeFileClient:
+    # Keeps the remote content, fails the range starting at fail_offset
+    def __init__(self, _fail_offset=None):
+        self.fail_offset = _fail_offset
+        self.data = None
+
+    def create_file(self, size):
+        self.data = bytearray(size)
+
+    def upload_range(self, data, offset, length):
+        if offset == self.fail_offset:
+            raise Exception("connection reset")
+        self.data[offset:offset + length] = data
+
+    def upload_file(self, data):
+        content = data.read()
+        self.create_file(len(content))
+        for offset in range(0, len(content), 2):
+            self.upload_range(content[offset:offset + 2], offset, len(content[offset:offset + 2]))
+
+    def delete_file(self):
+        self.data = None
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    source = tmp_path / "file.bin"
+    source.write_bytes(CONTENT)
+    return str(source)
+
+
+@pytest.mark.parametrize("max_connections", [1, 4])
+def test_upload_sends_the_whole_file(source_file, max_connections):
+    file_client = FakeFileClient()
+    upload_local_file(file_client, source_file, 2, max_connections)
+    assert bytes(file_client.data) == CONTENT
+
+
+@pytest.mark.parametrize("max_connections", [1, 4])
+def test_failed_upload_removes_the_partial_remote_file(source_file, max_connections):
+    file_client = FakeFileClient(6)
+    with pytest.raises(Exception):
+        upload_local_file(file_client, source_file, 2, max_connections)
+    assert file_client.data is None
+
+
+def test_missing_local_file_keeps_the_remote_file(tmp_path):
+    file_client = FakeFileClient()
+    file_client.data = bytearray(CONTENT)
+    with pytest.raises(OSError):
+        upload_local_file(file_client, str(tmp_path / "missing.bin"), 2, 4)
+    assert bytes(file_client.data) == CONTENT